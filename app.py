@@ -129,7 +129,7 @@ bouton_calcul = st.button("Calculer l'optimisation")
 
 if bouton_calcul:
     if algo_choice == "Exact (Docplex)":
-        patterns = optimiser_decoupe(longueurs, quantites, Long)
+        patterns = optimiser_decoupe(longueurs, quantites, Long, demande="exacte")
     else:
         patterns = optimiser_decoupe_dcg(longueurs, quantites, Long)
 
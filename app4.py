@@ -1,5 +1,6 @@
 # 1. First, add these imports at the top of your file
 import base64
+import os
 from io import BytesIO
 import pandas as pd
 import numpy as np
@@ -14,7 +15,7 @@ import datetime
 # 2. Add this function somewhere after your imports and before your main code
 def create_download_report(patterns, type_profile, type_detail, Long, largeur_totale=None, 
                            taux_perte=None, taux_efficacite=None, unique_patterns=None,
-                           epaisseur=None, is_surface_optim=False):
+                           epaisseur=None, is_surface_optim=False, borne_inferieure=None, surplus=None):
     """Creates a PDF report for download with optimization results"""
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
@@ -97,6 +98,11 @@ def create_download_report(patterns, type_profile, type_detail, Long, largeur_to
         stat_data.append(['Total des chutes (mm)', f"{int(total_waste)}"])
         stat_data.append(['Taux de chute', f"{taux_perte:.1f}%"])
         stat_data.append(['Taux d\'efficacité', f"{taux_efficacite:.1f}%"])
+        if borne_inferieure is not None:
+            stat_data.append(['Borne inférieure', f"{borne_inferieure} barres"])
+            stat_data.append(['Écart prouvé à l\'optimum', f"{len(patterns) - borne_inferieure} barre(s)"])
+        if surplus:
+            stat_data.append(['Pièces en surplus (stock)', ", ".join(f"{n} × {l} mm" for l, n in surplus.items())])
     
     # Create the statistics table with blue header
     stat_table = Table(stat_data, colWidths=[doc.width/2-10, doc.width/2-10])
@@ -369,9 +375,15 @@ def create_download_report(patterns, type_profile, type_detail, Long, largeur_to
     return b64_pdf
 
 import streamlit as st
-from backend_decoupe import optimiser_decoupe
-from backend_dcg import optimiser_decoupe_dcg
+from backend_anytime import resoudre_anytime
 from backend_surface import optimiser_decoupe_surface
+from backend_plan import PlanDecoupe
+from backend_bornes import calculer_bornes
+from backend_presolve import fusionner_doublons
+from backend_normalisation import normaliser
+from backend_estimation import SEUIL_CELLULES_DCG
+from backend_dcg import borne_lp
+from backend_bibliotheque import BIBLIOTHEQUE
 import plotly.graph_objects as go
 import numpy as np
 from collections import Counter
@@ -511,14 +523,37 @@ col1, col2 = st.columns(2)
 with col1:
     algo_choice = st.selectbox(
         "Choisissez l'algorithme d'optimisation :",
-        ("Exact (Docplex)", "Delayed Column Generation")
+        ("Automatique (selon la taille estimée)", "Exact (Docplex)", "Exact (HiGHS)", "Delayed Column Generation", "Grandes quantités (LP + arrondi)", "Branch-and-price", "Arc-flow (exact)",
+         "Heuristique FFD", "Heuristique BFD", "Heuristique Worst-Fit", "Portfolio parallèle")
     )
+    temps_limite = st.number_input("Temps limite de calcul (s) :", min_value=1, step=5, value=30)
+    trait_de_scie = st.number_input("Trait de scie (mm) :", min_value=0.0, step=0.5, value=0.0)
+    # Bibliothèque de patterns partagée entre les commandes, éventuellement conservée sur disque
+    persister_patterns = st.checkbox("Conserver la bibliothèque de patterns sur disque", value=False)
+    processus_enumeration = st.number_input("Processus pour l'énumération des patterns :", min_value=1,
+                                            max_value=os.cpu_count() or 1, step=1, value=1)
+    # Réglages propres à la session, transmis à chaque appel (la bibliothèque est partagée par le serveur)
+    options_bibliotheque = {'dossier_bibliotheque': ".cache_patterns" if persister_patterns else None,
+                            'processus': processus_enumeration}
+    # Énumérations de plusieurs millions de patterns : magasin projeté en mémoire, hors RAM
+    patterns_sur_disque = st.checkbox("Stocker les patterns sur disque (HiGHS, très grandes énumérations)", value=False)
 
 with col2:
     optim_type = st.selectbox(
         "Type d'optimisation :",
         ("Optimisation par longueur", "Optimisation par surface")
     )
+    modes_demande = {
+        "Quantités exactes": "exacte",
+        "Au moins les quantités (surplus gratuit)": "au_moins",
+        "Au moins les quantités (surplus coûteux et plafonné)": "surplus",
+    }
+    demande = modes_demande[st.selectbox("Demande :", tuple(modes_demande), index=1)]
+    cout_surplus, surplus_max = 0.0, None
+    if demande == "surplus":
+        cout_surplus = st.number_input("Coût d'une pièce en surplus (en barres) :", min_value=0.0, step=0.01, value=0.05)
+        surplus_max = st.number_input("Surplus maximal par longueur (pièces) :", min_value=0, step=1, value=2)
+    options_demande = {'demande': demande, 'cout_surplus': cout_surplus, 'surplus_max': surplus_max}
 
 st.markdown("""
     <style>
@@ -558,6 +593,9 @@ if bouton_calcul:
     # Fonction pour convertir les découpes en motifs uniques
     # 1. Correction de la fonction get_unique_patterns() - ligne 171 environ
     def get_unique_patterns(patterns):
+        if isinstance(patterns, PlanDecoupe):
+            # Plan compressé : les multiplicités sont déjà connues
+            return patterns.motifs_uniques()
         unique_patterns = {}
         
         for pattern in patterns:
@@ -590,16 +628,90 @@ if bouton_calcul:
         return list(unique_patterns.values())
     
     if optim_type == "Optimisation par longueur":
-        if algo_choice == "Exact (Docplex)":
-            patterns = optimiser_decoupe(longueurs, quantites, Long)
-        else:
-            patterns = optimiser_decoupe_dcg(longueurs, quantites, Long)
+        moteurs = {
+            "Automatique (selon la taille estimée)": ("auto", {}),
+            "Exact (Docplex)": ("exact", {}),
+            "Exact (HiGHS)": ("highs", {'stockage': "disque" if patterns_sur_disque else "memoire"}),
+            "Delayed Column Generation": ("dcg", {}),
+            "Grandes quantités (LP + arrondi)": ("grandes_quantites", {}),
+            "Branch-and-price": ("branch_price", {}),
+            "Arc-flow (exact)": ("arcflow", {}),
+            "Heuristique FFD": ("heuristique", {'strategie': "ffd"}),
+            "Heuristique BFD": ("heuristique", {'strategie': "bfd"}),
+            "Heuristique Worst-Fit": ("heuristique", {'strategie': "wfd"}),
+            "Portfolio parallèle": ("portfolio", {}),
+        }
+        moteur, options_moteur = moteurs[algo_choice]
+
+        # Une même longueur saisie plusieurs fois ne forme qu'une ligne de commande
+        longueurs, quantites, _ = fusionner_doublons(longueurs, quantites)
+
+        # Un premier plan s'affiche immédiatement puis est remplacé à chaque amélioration
+        progression = st.empty()
+        plan_provisoire = st.empty()
+        try:
+            for etape in resoudre_anytime(longueurs, quantites, Long, moteur, temps_limite,
+                                          trait_de_scie=trait_de_scie, **options_moteur, **options_demande,
+                                          **options_bibliotheque):
+                patterns = etape['plan']
+                statut = "optimalité prouvée" if etape['optimal'] else ("budget atteint" if etape['final'] else "amélioration en cours...")
+                progression.info(f"Meilleur plan : {len(patterns)} barres - borne inférieure : {etape['borne']} barres "
+                                 f"({statut}, {etape['temps']:.1f} s)")
+                if etape['final']:
+                    # Le plan définitif est détaillé plus bas
+                    plan_provisoire.empty()
+                else:
+                    plan_provisoire.dataframe(pd.DataFrame([
+                        {'Motif': " + ".join(map(str, motif['pattern'])), 'Barres': motif['count'], 'Chute (mm)': motif['waste']}
+                        for motif in get_unique_patterns(patterns)
+                    ]), use_container_width=True, hide_index=True)
+        except ValueError as erreur:
+            st.error(str(erreur))
+            st.stop()
+        infos_moteur = etape['infos']
+        if 'selection' in infos_moteur:
+            # Taille estimée avant toute énumération et moteur retenu (ou imposé par l'utilisateur)
+            estimation, selection = infos_moteur['estimation'], infos_moteur['selection']
+            moteur = selection['moteur']
+            st.caption(f"Estimation : {estimation['patterns']:.3g} patterns ({estimation['patterns_maximaux']:.3g} maximaux), "
+                       f"graphe arc-flow de {estimation['noeuds']} noeuds et {estimation['arcs']} arcs, "
+                       f"{estimation['pieces']} pièces - moteur « {moteur} » : {selection['raison']}")
+        if infos_moteur.get('presolve', {}).get('barres_fixees'):
+            st.caption(f"Presolve : {infos_moteur['presolve']['barres_fixees']} barre(s) fixée(s) d'avance, "
+                       f"{infos_moteur['presolve']['longueurs_restantes']} longueur(s) transmise(s) au moteur")
+
+        # Bornes inférieures : combinatoires, LP par génération de colonnes et borne du moteur
+        longueurs_normalisees, Long_normalisee, _ = normaliser(longueurs, Long, trait_de_scie)
+        bornes = calculer_bornes(longueurs_normalisees, quantites, Long_normalisee)
+        # Borne LP dans ce qu'il reste du budget, et pas quand le pricing est trop coûteux
+        reste = temps_limite - etape['temps']
+        if reste > 0 and len(longueurs_normalisees) * Long_normalisee <= SEUIL_CELLULES_DCG:
+            bornes['LP'] = borne_lp(longueurs_normalisees, quantites, Long_normalisee, temps_limite=reste)
+        borne_inferieure = max(max(bornes.values()), etape['borne'] or 0)
+
+        if moteur == "arcflow" and 'nb_arcs' in infos_moteur:
+            st.caption(f"Graphe arc-flow : {infos_moteur['nb_noeuds']} noeuds, {infos_moteur['nb_arcs']} arcs")
+        elif moteur == "highs" and 'nb_patterns' in infos_moteur:
+            memoire = ""
+            if infos_moteur.get('rss_resolution') is not None:
+                memoire += f", mémoire résidente {infos_moteur['rss_resolution']:+.0f} Mo pendant la résolution"
+            if infos_moteur.get('rss_max'):
+                memoire += f", pic du processus depuis son lancement {infos_moteur['rss_max']:.0f} Mo"
+            st.caption(f"HiGHS : {infos_moteur['nb_patterns']} patterns énumérés ({options_moteur.get('stockage', 'memoire')}){memoire}")
+        elif moteur == "branch_price" and 'nb_noeuds' in infos_moteur:
+            st.caption(f"Branch-and-price : {infos_moteur['nb_noeuds']} noeud(s) explorés")
+        elif moteur == "heuristique" and 'ecart' in infos_moteur:
+            st.caption(f"Écart à la borne inférieure : {infos_moteur['ecart']} barre(s) ({infos_moteur['ecart_relatif'] * 100:.1f}%)")
+        elif moteur == "grandes_quantites" and 'barres_supplementaires' in infos_moteur:
+            st.caption(f"Arrondi de la relaxation LP : {infos_moteur['barres_supplementaires']} barre(s) de plus que la borne LP")
+        elif moteur == "portfolio" and 'gagnant' in infos_moteur:
+            st.caption(f"Portfolio : meilleur plan obtenu par le moteur « {infos_moteur['gagnant']} »")
             
         # Calcul des statistiques
         # Calcul des statistiques avec protection contre la division par zéro
-        total_barres = len(patterns)
-        total_coupe = sum(sum(pattern['cuts']) for pattern in patterns)
-        total_waste = sum(pattern['waste'] for pattern in patterns)
+        total_barres = patterns.nb_barres
+        total_coupe = patterns.total_coupe
+        total_waste = patterns.total_chute
         total_longueur_utilisee = total_coupe
         total_longueur_achetee = total_barres * Long if total_barres > 0 else 1  # Éviter division par zéro
         taux_perte = (total_waste / total_longueur_achetee) * 100 if total_longueur_achetee > 0 else 0
@@ -619,6 +731,28 @@ if bouton_calcul:
         col3.metric("Taux de perte (%)", f"{taux_perte:.2f}")
         col4.metric("Taux d'efficacité (%)", f"{taux_efficacite:.2f}")
 
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Borne inférieure (barres)", borne_inferieure)
+        col2.metric("Écart prouvé (barres)", total_barres - borne_inferieure)
+        col3.metric("Écart prouvé (%)", f"{(total_barres - borne_inferieure) / borne_inferieure * 100 if borne_inferieure else 0:.2f}")
+        col4.metric("Optimalité", "prouvée" if total_barres <= borne_inferieure else "non prouvée")
+        st.caption("Bornes : " + " - ".join(f"{nom} = {valeur}" for nom, valeur in bornes.items()))
+        cache = BIBLIOTHEQUE.statistiques()
+        st.caption(f"Bibliothèque de patterns : {cache['succes']} succès (dont {cache['lectures_disque']} lu(s) sur disque), "
+                   f"{cache['echecs']} énumération(s), {cache['entrees']} jeu(x) de longueurs en cache "
+                   f"({cache['octets'] / 2**20:.0f} Mo, partagés par toutes les sessions)")
+        enumeration = infos_moteur.get('enumeration', {})
+        if enumeration.get('tranches'):
+            durees = [tranche['duree'] for tranche in enumeration['tranches']]
+            st.caption(f"Énumération : {len(durees)} tranches sur {enumeration['processus']} "
+                       f"processus en {enumeration['temps_enumeration']:.1f} s - tranche la plus longue "
+                       f"{max(durees):.2f} s, moyenne {sum(durees) / len(durees):.3f} s")
+
+        # Pièces produites au-delà de la commande, à mettre en stock
+        surplus = patterns.surplus(longueurs, quantites)
+        if surplus:
+            st.info("Pièces en surplus à stocker : " + ", ".join(f"{n} × {l} mm" for l, n in surplus.items()))
+
         # Visualisation en camembert
         fig_pie = go.Figure(data=[go.Pie(
             labels=['Utilisé', 'Perte'],
@@ -834,7 +968,9 @@ if bouton_calcul:
                 Long=Long,
                 taux_perte=taux_perte,
                 taux_efficacite=taux_efficacite,
-                unique_patterns=unique_patterns
+                unique_patterns=unique_patterns,
+                borne_inferieure=borne_inferieure,
+                surplus=surplus
             )
             
             download_filename = f"decoupe_{type_profile}_{type_detail}.pdf"
@@ -882,16 +1018,18 @@ if bouton_calcul:
             surface_patterns = optimiser_decoupe_surface(
                 longueurs, largeurs, quantites, 
                 type_profile, type_detail, Long, 
-                largeur_totale, epaisseur
+                largeur_totale, epaisseur,
+                temps_limite=temps_limite, trait_de_scie=trait_de_scie, **options_demande,
+                **options_bibliotheque
             )
             
             if type_profile == "Tôle/Platine":
                 # Statistiques pour les tôles/platines (optimisation 2D)
-                total_plaques = len(surface_patterns)
+                total_plaques = surface_patterns.nb_barres
                 total_surface_achetee = total_plaques * Long * largeur_totale if total_plaques > 0 else 1
-                total_waste_surface = sum(pattern['waste_surface'] for pattern in surface_patterns)
+                total_waste_surface = surface_patterns.total_chute_surface
                 # Protection contre la division par zéro
-                taux_perte_surface = sum(pattern['waste_percentage'] for pattern in surface_patterns) / total_plaques if total_plaques > 0 else 0
+                taux_perte_surface = surface_patterns.total_pourcentage_chute / total_plaques if total_plaques > 0 else 0
                 taux_efficacite_surface = 100 - taux_perte_surface
 
                 
@@ -1111,13 +1249,13 @@ if bouton_calcul:
                 
             else:  # UPN ou Cornière (optimisation 1D avec calcul de surface)
                 # Statistiques pour les UPN/Cornières
-                total_barres = len(surface_patterns)
-                total_coupe = sum(len(pattern['cuts']) for pattern in surface_patterns)
-                total_waste_length = sum(pattern['waste_length'] for pattern in surface_patterns)
-                total_waste_surface = sum(pattern['waste_surface'] for pattern in surface_patterns)
+                total_barres = surface_patterns.nb_barres
+                total_coupe = sum(len(entree.pattern['cuts']) * entree.multiplicite for entree in surface_patterns.entrees)
+                total_waste_length = surface_patterns.total_chute
+                total_waste_surface = surface_patterns.total_chute_surface
                 total_longueur_achetee = total_barres * Long
                 taux_perte_longueur = (total_waste_length / total_longueur_achetee) * 100
-                taux_perte_surface = sum(pattern['waste_percentage'] for pattern in surface_patterns) / total_barres
+                taux_perte_surface = surface_patterns.total_pourcentage_chute / total_barres
                 
                 st.markdown("""
                     <h3 style="color:blue; background-color:#E3F2FD; padding:8px; border-radius:8px;">
@@ -223,7 +223,7 @@ if bouton_calcul:
     
     if optim_type == "Optimisation par longueur":
         if algo_choice == "Exact (Docplex)":
-            patterns = optimiser_decoupe(longueurs, quantites, Long)
+            patterns = optimiser_decoupe(longueurs, quantites, Long, demande="exacte")
         else:
             patterns = optimiser_decoupe_dcg(longueurs, quantites, Long)
             
@@ -0,0 +1,145 @@
+# backend_anytime.py
+
+import queue
+import threading
+import time
+from backend_decoupe import optimiser_decoupe
+from backend_highs import optimiser_decoupe_highs
+from backend_dcg import optimiser_decoupe_dcg, optimiser_decoupe_grandes_quantites
+from backend_arcflow import optimiser_decoupe_arcflow
+from backend_heuristique import optimiser_decoupe_heuristique
+from backend_bornes import borne_combinatoire
+from backend_presolve import presoudre, completer_plan, verifier_commande, reduire_valeurs
+from backend_normalisation import normaliser, denormaliser_plan
+from backend_plan import PlanDecoupe
+from backend_branch_price import optimiser_decoupe_branch_price
+from backend_portfolio import optimiser_decoupe_portfolio
+from backend_estimation import estimer_taille, choisir_moteur
+from backend_demande import DEMANDE_DEFAUT
+
+MOTEURS = {
+    "exact": optimiser_decoupe,
+    "highs": optimiser_decoupe_highs,
+    "dcg": optimiser_decoupe_dcg,
+    "grandes_quantites": optimiser_decoupe_grandes_quantites,
+    "branch_price": optimiser_decoupe_branch_price,
+    "arcflow": optimiser_decoupe_arcflow,
+    "heuristique": optimiser_decoupe_heuristique,
+    "portfolio": optimiser_decoupe_portfolio,
+}
+
+# Options de la bibliothèque de patterns (generer_patterns), transmises aux seuls moteurs qui énumèrent
+OPTIONS_ENUMERATION = ('dossier_bibliotheque', 'processus')
+MOTEURS_ENUMERATION = ("exact", "highs")
+
+def resoudre_anytime(longueurs, quantites, L=6000, moteur="dcg", temps_limite=30, trait_de_scie=0, **options):
+    """
+    Générateur de plans de plus en plus bons pour la découpe 1D.
+    Les longueurs (éventuellement décimales) et le trait de scie sont d'abord normalisés en
+    entiers divisés par leur PGCD (backend_normalisation) : les tables indexées par la capacité
+    rétrécissent d'autant, et les plans produits sont rendus dans les longueurs d'origine.
+    La commande est ensuite réduite (presoudre : doublons fusionnés, barres pleines et grandes
+    pièces fixées, pièces trop longues rejetées par ValueError) ; le moteur ne traite que
+    l'instance réduite et les barres fixées sont rajoutées à chaque plan produit.
+    Produit d'abord immédiatement un plan First-Fit Decreasing, puis chaque incumbent
+    amélioré du moteur choisi, jusqu'à épuisement du budget ou preuve d'optimalité.
+    Chaque élément est un dictionnaire {'plan', 'borne', 'optimal', 'temps', 'final', 'infos'},
+    'infos' contenant les informations remplies par le moteur.
+    moteur="auto" : le moteur est choisi d'après la taille estimée de l'instance réduite
+    (backend_estimation.choisir_moteur) ; l'estimation et le choix sont rangés dans
+    infos['estimation'] et infos['selection'], y compris pour un moteur imposé.
+    options : paramètres propres au moteur, dont le mode de demande (demande, cout_surplus,
+    surplus_max, DEMANDE_DEFAUT si absent) ; les valeurs données par longueur suivent la
+    réduction de la commande. Les OPTIONS_ENUMERATION (dossier_bibliotheque, processus)
+    ne sont transmises qu'aux MOTEURS_ENUMERATION, y compris lorsque moteur="auto" ; le bilan
+    d'une énumération est alors dans infos['enumeration'].
+    """
+    debut = time.perf_counter()
+    verifier_commande(longueurs, quantites, L)
+    options.setdefault('demande', DEMANDE_DEFAUT)
+    longueurs, L, correspondance = normaliser(longueurs, L, trait_de_scie)
+    longueurs_reduites, quantites_reduites, barres_fixees = presoudre(longueurs, quantites, L)
+    for cle in ('cout_surplus', 'surplus_max'):
+        if cle in options:
+            options[cle] = reduire_valeurs(options[cle], longueurs, longueurs_reduites)
+    nb_fixees = sum(n for _, n in barres_fixees)
+    presolve = {'barres_fixees': nb_fixees, 'longueurs_restantes': len(longueurs_reduites),
+                'pas': float(correspondance['pas']), 'capacite': L}
+
+    if not longueurs_reduites:
+        plan = denormaliser_plan(completer_plan(PlanDecoupe(), barres_fixees), correspondance)
+        plan.infos = {'presolve': presolve, 'optimal': True}
+        yield {'plan': plan, 'borne': nb_fixees, 'optimal': True,
+               'temps': time.perf_counter() - debut, 'final': True, 'infos': plan.infos}
+        return
+
+    for etape in resoudre_anytime_reduit(longueurs_reduites, quantites_reduites, L, moteur, temps_limite, **options):
+        etape['infos']['presolve'] = presolve
+        etape['plan'] = denormaliser_plan(completer_plan(etape['plan'], barres_fixees), correspondance)
+        etape['borne'] = (etape['borne'] or 0) + nb_fixees
+        yield etape
+
+def resoudre_anytime_reduit(longueurs, quantites, L, moteur, temps_limite, **options):
+    """
+    Boucle anytime sur une instance déjà réduite (voir resoudre_anytime)
+    """
+    debut = time.perf_counter()
+    borne = borne_combinatoire(longueurs, quantites, L)
+
+    meilleur = optimiser_decoupe_heuristique(longueurs, quantites, L, "ffd")
+    yield {'plan': meilleur, 'borne': borne, 'optimal': len(meilleur) <= borne,
+           'temps': time.perf_counter() - debut, 'final': len(meilleur) <= borne, 'infos': meilleur.infos}
+    if len(meilleur) <= borne:
+        return
+
+    # Taille estimée des modèles, avant toute énumération ; elle décide du moteur en mode "auto"
+    estimation = estimer_taille(longueurs, quantites, L)
+    if moteur == "auto":
+        moteur, raison = choisir_moteur(estimation, options['demande'])
+    else:
+        raison = "moteur imposé"
+    reglages = {cle: options.pop(cle) for cle in OPTIONS_ENUMERATION if cle in options}
+    if moteur in MOTEURS_ENUMERATION:
+        options.update(reglages)
+    infos = {'estimation': estimation, 'selection': {'moteur': moteur, 'raison': raison}}
+
+    # Le moteur tourne dans un thread ; ses incumbents arrivent par la file
+    file = queue.Queue()
+
+    def callback(plan, borne_moteur):
+        file.put(('incumbent', plan, borne_moteur))
+
+    def executer():
+        try:
+            plan = MOTEURS[moteur](longueurs, quantites, L, temps_limite=temps_limite,
+                                   callback=callback, infos=infos, **options)
+            file.put(('fin', plan, infos.get('borne_inferieure')))
+        except Exception as erreur:
+            file.put(('erreur', erreur, None))
+
+    threading.Thread(target=executer, daemon=True).start()
+
+    # Marge au-delà du budget pour les phases non interruptibles (énumération, construction du modèle)
+    echeance = debut + temps_limite * 1.1 + 1
+    while True:
+        try:
+            nature, plan, borne_moteur = file.get(timeout=max(echeance - time.perf_counter(), 0.01))
+        except queue.Empty:
+            # Budget épuisé : le meilleur plan connu est rendu, le moteur est abandonné
+            yield {'plan': meilleur, 'borne': borne, 'optimal': len(meilleur) <= borne,
+                   'temps': time.perf_counter() - debut, 'final': True, 'infos': infos}
+            return
+        if nature == 'erreur':
+            raise plan
+        if borne_moteur is not None:
+            borne = max(borne, borne_moteur)
+        if nature == 'fin':
+            if plan and len(plan) <= len(meilleur):
+                meilleur = plan
+            yield {'plan': meilleur, 'borne': borne, 'optimal': len(meilleur) <= borne or infos.get('optimal', False),
+                   'temps': time.perf_counter() - debut, 'final': True, 'infos': infos}
+            return
+        if plan and len(plan) < len(meilleur):
+            meilleur = plan
+            yield {'plan': meilleur, 'borne': borne, 'optimal': len(meilleur) <= borne,
+                   'temps': time.perf_counter() - debut, 'final': False, 'infos': infos}
@@ -0,0 +1,144 @@
+# backend_arcflow.py
+
+from pulp import (LpProblem, LpVariable, LpMinimize, lpSum, LpInteger, PULP_CBC_CMD, LpStatus, value,
+                  LpSolutionOptimal, LpSolutionIntegerFeasible)
+from collections import defaultdict
+from backend_plan import PlanDecoupe, plan_depuis_barres
+from backend_heuristique import plan_heuristique_optimal
+from backend_demande import preparer_demande, DEMANDE_DEFAUT
+
+def construire_graphe_arcflow(longueurs, quantites, L):
+    """
+    Construit le graphe arc-flow sur les positions 0..L.
+    Réduction de symétrie : les pièces sont placées par longueur décroissante,
+    un arc de la longueur i ne part que d'une position atteignable avec les
+    longueurs plus grandes, et chaque chaîne est bornée par la quantité demandée.
+    Retourne (noeuds, arcs) avec arcs = liste de (debut, fin, indice_longueur),
+    indice_longueur valant None pour les arcs de chute vers L.
+    """
+    ordre = sorted(range(len(longueurs)), key=lambda i: longueurs[i], reverse=True)
+    positions = {0}
+    arcs_pieces = set()
+
+    for i in ordre:
+        l = longueurs[i]
+        borne = min(quantites[i], L // l)
+        nouvelles = set()
+        for d in positions:
+            p = d
+            for _ in range(borne):
+                if p + l > L:
+                    break
+                arcs_pieces.add((p, p + l, i))
+                p += l
+                nouvelles.add(p)
+        positions |= nouvelles
+
+    noeuds = sorted(positions | {L})
+    # Arcs de chute : de chaque position intermédiaire directement vers la fin de barre
+    arcs_chute = [(d, L, None) for d in noeuds if 0 < d < L]
+    arcs = sorted(arcs_pieces) + arcs_chute
+    return noeuds, arcs
+
+def decomposer_flot(flots, longueurs, L):
+    """
+    Décompose un flot entier de 0 vers L en patterns de découpe
+    """
+    sortants = defaultdict(list)
+    for (d, f, i), n in flots.items():
+        if n > 0:
+            sortants[d].append([f, i, n])
+
+    resultats = []
+    while sortants[0]:
+        cuts = []
+        d = 0
+        while d != L:
+            arc = sortants[d][-1]
+            f, i, _ = arc
+            arc[2] -= 1
+            if arc[2] == 0:
+                sortants[d].pop()
+            if i is not None:
+                cuts.append(longueurs[i])
+            d = f
+        resultats.append({
+            'cuts': cuts,
+            'waste': L - sum(cuts)
+        })
+    return resultats
+
+def optimiser_decoupe_arcflow(longueurs, quantites, L=6000, temps_limite=None, callback=None, infos=None,
+                              demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None):
+    """
+    Optimise la découpe de barres avec la formulation arc-flow (Valério de Carvalho).
+    La taille du modèle est pseudo-polynomiale en L au lieu d'être exponentielle
+    en nombre de longueurs. infos : dictionnaire optionnel rempli avec le nombre
+    de noeuds / d'arcs du graphe et le statut du solveur.
+    temps_limite : budget en secondes donné à CBC ; callback(plan, borne) reçoit le plan final.
+    demande : "au_moins", "exacte" ou "surplus" (voir backend_demande).
+    Si le plan FFD atteint la borne inférieure combinatoire, il est renvoyé sans résolution.
+    """
+    if infos is None:
+        infos = {}
+    demande = preparer_demande(quantites, demande, cout_surplus, surplus_max)
+    resultats = plan_heuristique_optimal(longueurs, quantites, L, infos, callback)
+    if resultats is not None:
+        return resultats
+
+    noeuds, arcs = construire_graphe_arcflow(longueurs, quantites, L)
+    infos['nb_noeuds'] = len(noeuds)
+    infos['nb_arcs'] = len(arcs)
+
+    # Création du modèle
+    mdl = LpProblem("decoupe_arcflow", LpMinimize)
+    f = {arc: LpVariable(f"f_{k}", lowBound=0, cat=LpInteger) for k, arc in enumerate(arcs)}
+    z = LpVariable("z", lowBound=0, cat=LpInteger)
+
+    entrants = defaultdict(list)
+    sortants = defaultdict(list)
+    par_longueur = defaultdict(list)
+    for arc in arcs:
+        d, fin, i = arc
+        sortants[d].append(f[arc])
+        entrants[fin].append(f[arc])
+        if i is not None:
+            par_longueur[i].append(f[arc])
+
+    # Conservation du flot : z barres partent de 0 et arrivent en L
+    for d in noeuds:
+        if d == 0:
+            mdl += lpSum(sortants[d]) == z
+        elif d == L:
+            mdl += lpSum(entrants[d]) == z
+        else:
+            mdl += lpSum(entrants[d]) == lpSum(sortants[d])
+
+    # Contraintes : satisfaire les quantités demandées (exactement, ou au moins et sous le plafond)
+    for j in range(len(longueurs)):
+        if demande['mode'] == "exacte":
+            mdl += lpSum(par_longueur[j]) == quantites[j]
+        else:
+            mdl += lpSum(par_longueur[j]) >= quantites[j]
+            if demande['maximums'][j] is not None:
+                mdl += lpSum(par_longueur[j]) <= demande['maximums'][j]
+
+    # Objectif : minimiser le nombre de barres utilisées (plus le coût des pièces en surplus)
+    mdl += z + lpSum(float(c) * lpSum(par_longueur[j]) for j, c in enumerate(demande['couts']) if c)
+
+    solver = PULP_CBC_CMD(msg=0, timeLimit=temps_limite)
+    mdl.solve(solver)
+    infos['statut'] = LpStatus[mdl.status]
+    infos['optimal'] = mdl.sol_status == LpSolutionOptimal
+
+    if mdl.sol_status not in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        return PlanDecoupe()
+
+    flots = {arc: int(round(value(var))) for arc, var in f.items()}
+    resultats = plan_depuis_barres(decomposer_flot(flots, longueurs, L))
+    resultats.infos = infos
+    if callback is not None:
+        optimal_barres = infos['optimal'] and demande['mode'] != "surplus"
+        borne = len(resultats) if optimal_barres else infos['borne_inferieure']
+        callback(resultats, borne)
+    return resultats
@@ -0,0 +1,216 @@
+# backend_bibliotheque.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend_enumeration import enumerer_magasin
+from backend_magasin import MagasinPatterns
+
+class BibliothequePatterns:
+    """
+    Cache des patterns réalisables d'un jeu de longueurs, indépendant des quantités.
+    Une entrée, clé (longueurs triées, L, trait de scie), contient la matrice des comptes
+    (patterns x longueurs, int32) et le vecteur des chutes, énumérés avec des plafonds
+    par longueur (les plus grandes quantités déjà demandées, au plus L // l) ; une commande
+    de quantités inférieures est servie par simple filtrage, sans énumération. Une entrée
+    portant sur davantage de longueurs sert aussi (patterns nuls sur les longueurs absentes).
+    Éviction LRU au-delà de octets_max octets (comptes et chutes de toutes les entrées) ; la
+    dernière entrée rangée est toujours gardée. Le cache est partagé entre les threads (une
+    session Streamlit par thread) : les entrées et les compteurs sont protégés par un verrou,
+    qui n'est pas tenu pendant une énumération ni pendant une lecture ou une écriture sur disque.
+    Le dossier de persistance, le nombre de processus et le dictionnaire recevant le bilan de
+    l'énumération sont propres à chaque appel de patterns.
+    """
+
+    def __init__(self, octets_max=256 * 2**20):
+        self.octets_max = octets_max
+        self.entrees = OrderedDict()
+        self.octets = 0
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.lectures_disque = 0
+        self.echecs = 0
+
+    @staticmethod
+    def cle(longueurs, L, trait_de_scie=0):
+        return tuple(sorted(longueurs)), L, trait_de_scie
+
+    def statistiques(self):
+        """Succès (dont lectures sur disque), échecs (énumérations) et taille du cache"""
+        with self.verrou:
+            return {
+                'succes': self.succes,
+                'lectures_disque': self.lectures_disque,
+                'echecs': self.echecs,
+                'entrees': len(self.entrees),
+                'patterns': sum(len(e['chutes']) for e in self.entrees.values()),
+                'octets': self.octets,
+            }
+
+    def vider(self):
+        with self.verrou:
+            self.entrees.clear()
+            self.octets = 0
+            self.succes = self.lectures_disque = self.echecs = 0
+
+    def patterns(self, longueurs, L, quantites=None, maximaux=False, trait_de_scie=0, dossier=None, processus=1,
+                 infos=None):
+        """
+        Patterns réalisables (comptes, chutes) pour les longueurs données, dans leur ordre :
+        chaque pièce consomme l + trait_de_scie sur une capacité L + trait_de_scie.
+        quantites : plafonne le nombre de chaque longueur à la quantité demandée.
+        maximaux : ne garde que les patterns où plus aucune pièce autorisée ne rentre.
+        dossier : persistance des entrées sur disque (un fichier .npz par clé), relues
+        lorsqu'elles manquent en mémoire ; None : mémoire seule.
+        processus : nombre de processus d'une énumération (backend_enumeration.enumerer_magasin).
+        infos : dictionnaire optionnel ; une énumération y range son bilan par tranche sous la
+        clé 'enumeration' (rien n'y est écrit lorsque le cache suffit).
+        """
+        capacite = L + trait_de_scie
+        tailles = np.array([l + trait_de_scie for l in longueurs], dtype=np.int64)
+        plafonds = capacite // tailles
+        if quantites is not None:
+            plafonds = np.minimum(plafonds, np.asarray(quantites, dtype=np.int64))
+
+        entree = self._chercher(longueurs, L, trait_de_scie, plafonds, dossier)
+        if entree is None:
+            with self.verrou:
+                self.echecs += 1
+            entree = self._generer(longueurs, L, trait_de_scie, plafonds, dossier, processus, infos)
+
+        # Colonnes dans l'ordre demandé ; les longueurs absentes de la commande doivent être nulles
+        colonnes = [entree['index'][l] for l in longueurs]
+        garder = (entree['comptes'][:, colonnes] <= plafonds).all(axis=1)
+        absentes = np.setdiff1d(np.arange(len(entree['index'])), colonnes)
+        if len(absentes):
+            garder &= ~entree['comptes'][:, absentes].any(axis=1)
+        comptes = entree['comptes'][garder][:, colonnes]
+        chutes = entree['chutes'][garder]
+        garder = comptes.any(axis=1)
+
+        if maximaux:
+            # Plus petite pièce encore autorisée dans chaque pattern : elle ne doit pas tenir dans la chute
+            libres = np.where(comptes < plafonds, tailles, capacite + 1).min(axis=1, initial=capacite + 1)
+            garder &= chutes < libres
+        return comptes[garder], chutes[garder]
+
+    def _chercher(self, longueurs, L, trait_de_scie, plafonds, dossier):
+        """Entrée couvrant les longueurs et les plafonds demandés (mémoire, puis disque), ou None"""
+        cle = self.cle(longueurs, L, trait_de_scie)
+        with self.verrou:
+            for cle_entree in [cle] + [c for c in reversed(self.entrees) if c != cle]:
+                entree = self.entrees.get(cle_entree)
+                if entree is not None and cle_entree[1:] == cle[1:] and self._couvre(entree, longueurs, plafonds):
+                    self.entrees.move_to_end(cle_entree)
+                    self.succes += 1
+                    return entree
+        if dossier is not None:
+            entree = self._lire(cle, dossier)
+            if entree is not None and self._couvre(entree, longueurs, plafonds):
+                with self.verrou:
+                    self.succes += 1
+                    self.lectures_disque += 1
+                    self._ranger(cle, entree)
+                return entree
+        return None
+
+    @staticmethod
+    def _couvre(entree, longueurs, plafonds):
+        index = entree['index']
+        return all(l in index and entree['bornes'][index[l]] >= p for l, p in zip(longueurs, plafonds))
+
+    def _generer(self, longueurs, L, trait_de_scie, plafonds, dossier, processus, infos):
+        """
+        Énumère les patterns des longueurs triées ; les plafonds d'une entrée existante
+        pour la même clé sont conservés (le cache ne perd jamais de patterns)
+        """
+        cle = self.cle(longueurs, L, trait_de_scie)
+        triees = list(cle[0])
+        bornes = dict(zip(longueurs, plafonds.tolist()))
+        with self.verrou:
+            ancienne = self.entrees.get(cle)
+        if ancienne is None and dossier is not None:
+            ancienne = self._lire(cle, dossier)
+        if ancienne is not None:
+            for l, j in ancienne['index'].items():
+                bornes[l] = max(bornes[l], int(ancienne['bornes'][j]))
+        bornes = np.array([bornes[l] for l in triees], dtype=np.int64)
+
+        tailles = [l + trait_de_scie for l in triees]
+        bilan = {}
+        magasin = enumerer_magasin(MagasinPatterns(tailles, L + trait_de_scie), tailles, L + trait_de_scie,
+                                   bornes, processus=processus, infos=bilan)
+        if infos is not None:
+            infos['enumeration'] = bilan
+        entree = {
+            'index': {l: j for j, l in enumerate(triees)},
+            'bornes': bornes,
+            'comptes': magasin.comptes.copy(),
+            'chutes': magasin.chutes.astype(np.int64),
+        }
+        with self.verrou:
+            # Une énumération concurrente de la même clé a pu ranger des plafonds plus grands
+            actuelle = self.entrees.get(cle)
+            if actuelle is None or (actuelle['bornes'] < bornes).any():
+                self._ranger(cle, entree)
+        if dossier is not None:
+            self._ecrire(cle, entree, dossier)
+        return entree
+
+    @staticmethod
+    def _taille(entree):
+        return entree['comptes'].nbytes + entree['chutes'].nbytes
+
+    def _ranger(self, cle, entree):
+        """Range l'entrée puis évince les moins récentes au-delà de octets_max (verrou tenu)"""
+        if cle in self.entrees:
+            self.octets -= self._taille(self.entrees[cle])
+        self.entrees[cle] = entree
+        self.entrees.move_to_end(cle)
+        self.octets += self._taille(entree)
+        while self.octets > self.octets_max and len(self.entrees) > 1:
+            _, evincee = self.entrees.popitem(last=False)
+            self.octets -= self._taille(evincee)
+
+    @staticmethod
+    def _chemin(cle, dossier):
+        return os.path.join(dossier, f"patterns_{hashlib.sha1(repr(cle).encode()).hexdigest()}.npz")
+
+    def _ecrire(self, cle, entree, dossier):
+        os.makedirs(dossier, exist_ok=True)
+        chemin = self._chemin(cle, dossier)
+        # Écriture puis renommage : un fichier partiel n'est jamais relu
+        provisoire = chemin + ".tmp.npz"
+        np.savez_compressed(provisoire, longueurs=np.array(cle[0]), bornes=entree['bornes'],
+                            comptes=entree['comptes'], chutes=entree['chutes'])
+        os.replace(provisoire, chemin)
+
+    def _lire(self, cle, dossier):
+        chemin = self._chemin(cle, dossier)
+        if not os.path.exists(chemin):
+            return None
+        with np.load(chemin) as donnees:
+            if tuple(donnees['longueurs'].tolist()) != cle[0]:
+                return None
+            return {
+                'index': {l: j for j, l in enumerate(cle[0])},
+                'bornes': donnees['bornes'],
+                'comptes': donnees['comptes'],
+                'chutes': donnees['chutes'],
+            }
+
+BIBLIOTHEQUE = BibliothequePatterns()
+
+def configurer_bibliotheque(octets_max):
+    """
+    Règle la taille (octets) du cache partagé par tout le processus ; le dossier de
+    persistance et le nombre de processus se donnent à chaque appel (generer_patterns)
+    """
+    with BIBLIOTHEQUE.verrou:
+        BIBLIOTHEQUE.octets_max = octets_max
+        # Le dernier rangement est refait pour appliquer la nouvelle limite
+        if BIBLIOTHEQUE.entrees:
+            cle = next(reversed(BIBLIOTHEQUE.entrees))
+            BIBLIOTHEQUE._ranger(cle, BIBLIOTHEQUE.entrees[cle])
@@ -0,0 +1,69 @@
+# backend_bornes.py
+
+import math
+import numpy as np
+
+def borne_inferieure_continue(longueurs, quantites, L):
+    """
+    Borne inférieure simple (L1) : ceil(somme(l * q) / L)
+    """
+    return math.ceil(sum(l * q for l, q in zip(longueurs, quantites)) / L)
+
+def borne_l2(longueurs, quantites, L):
+    """
+    Borne L2 de Martello et Toth. Pour chaque seuil K <= L/2, les pièces de plus de L - K
+    et celles de plus de L/2 occupent chacune une barre ; les pièces de longueur comprise
+    entre K et L/2 ne remplissent que la place laissée libre dans les barres des secondes.
+    """
+    l = np.asarray(longueurs, dtype=np.int64)
+    q = np.asarray(quantites, dtype=np.int64)
+    seuils = np.unique(np.concatenate(([0], l[2 * l <= L])))
+
+    meilleure = 0
+    for K in seuils:
+        j1 = l > L - K
+        j2 = (l > L / 2) & ~j1
+        j3 = (2 * l <= L) & (l >= K)
+        place_libre = q[j2].sum() * L - (l[j2] * q[j2]).sum()
+        surplus = (l[j3] * q[j3]).sum() - place_libre
+        valeur = q[j1].sum() + q[j2].sum() + max(0, -(-surplus // L))
+        meilleure = max(meilleure, int(valeur))
+    return meilleure
+
+def borne_dff(longueurs, quantites, L, k_max=20):
+    """
+    Bornes par fonctions dual-réalisables : ceil(somme(u(l) * q) / L) pour
+    - les fonctions de Fekete et Schepers u_k(x) = x si (k+1)x/L est entier,
+      floor((k+1)x/L) * L/k sinon (k = 1..k_max) ;
+    - les fonctions seuil de Martello et Toth f_e(x) = L si x > L - e, x si e <= x <= L - e, 0 sinon.
+    Retourne la meilleure de ces bornes. Calcul en entiers (valeurs multipliées par k).
+    """
+    l = np.asarray(longueurs, dtype=np.int64)
+    q = np.asarray(quantites, dtype=np.int64)
+
+    meilleure = 0
+    for k in range(1, k_max + 1):
+        produit = (k + 1) * l
+        valeurs_k = np.where(produit % L == 0, k * l, (produit // L) * L)
+        meilleure = max(meilleure, int(-(-(valeurs_k * q).sum() // (k * L))))
+
+    for e in np.unique(l[2 * l <= L]):
+        valeurs = np.where(l > L - e, L, np.where(l >= e, l, 0))
+        meilleure = max(meilleure, int(-(-(valeurs * q).sum() // L)))
+    return meilleure
+
+def calculer_bornes(longueurs, quantites, L):
+    """
+    Bornes inférieures combinatoires sur le nombre de barres : {'L1', 'L2', 'DFF'}
+    """
+    return {
+        'L1': borne_inferieure_continue(longueurs, quantites, L),
+        'L2': borne_l2(longueurs, quantites, L),
+        'DFF': borne_dff(longueurs, quantites, L),
+    }
+
+def borne_combinatoire(longueurs, quantites, L):
+    """
+    Meilleure borne inférieure combinatoire (L1, L2, fonctions dual-réalisables), en quelques millisecondes
+    """
+    return max(calculer_bornes(longueurs, quantites, L).values())
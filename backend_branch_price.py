@@ -0,0 +1,192 @@
+# backend_branch_price.py
+
+import math
+import time
+from backend_dcg import (generer_pattern_initial, compter_coupes,
+                         resoudre_sac_a_dos_borne, resoudre_sac_a_dos_exclusions)
+from backend_heuristique import placer_pieces, plan_heuristique_optimal
+from backend_plan import PlanDecoupe, plan_depuis_solution
+from backend_demande import preparer_demande, DEMANDE_DEFAUT
+from backend_lp import cout_colonne, SOLVEURS_LP
+
+COUT_ARTIFICIEL = 1000  # coût des variables artificielles gardant le maître réalisable
+TOLERANCE_PRICING = 1e-6  # coût réduit en deçà duquel une colonne entre dans le maître
+
+def completer_par_ffd(comptes_fixes, longueurs, quantites, L):
+    """
+    Complète une solution partielle {pattern: multiplicité} en plaçant
+    la demande résiduelle par First-Fit Decreasing.
+    """
+    solution = dict(comptes_fixes)
+    residuel = list(quantites)
+    for pattern, n in comptes_fixes.items():
+        for j, c in enumerate(pattern):
+            residuel[j] -= c * n
+
+    pieces = sorted(
+        (longueurs[j] for j in range(len(longueurs)) for _ in range(max(residuel[j], 0))),
+        reverse=True
+    )
+    barres, _ = placer_pieces(pieces, L, "ffd")
+    for cuts in barres:
+        pattern = tuple(compter_coupes({'cuts': cuts}, longueurs))
+        solution[pattern] = solution.get(pattern, 0) + 1
+    return solution
+
+def optimiser_decoupe_branch_price(longueurs, quantites, L=6000, max_noeuds=200, temps_limite=60,
+                                   max_iterations=500, callback=None, infos=None, demande=DEMANDE_DEFAUT,
+                                   cout_surplus=0.0, surplus_max=None, solveur_lp="highs"):
+    """
+    Optimise la découpe de barres par séparation-évaluation et génération de colonnes
+    (branch-and-price). La génération de colonnes est relancée à chaque noeud.
+    Branchement sur les variables de pattern : x_p >= ceil(x_p) (exploré en premier)
+    et x_p <= floor(x_p). Le pricing reste un sac à dos borné ; les patterns bornés
+    supérieurement sont exclus du pricing par une recherche dédiée.
+    La recherche s'arrête dès qu'un incumbent atteint la meilleure borne (combinatoire ou LP).
+    demande : "au_moins", "exacte" ou "surplus" (voir backend_demande) ; avec un coût de
+    surplus, incumbents et élagage portent sur le coût, et seule la borne combinatoire
+    est rapportée comme borne sur le nombre de barres.
+    solveur_lp : backend du maître persistant, clé de SOLVEURS_LP (HiGHS par défaut, sans
+    limite de taille ; CPLEX Community refuse plus de 1000 variables).
+    callback(plan, borne) est appelé à chaque nouvel incumbent.
+    Le budget temps_limite est aussi vérifié pendant la génération de colonnes d'un noeud ;
+    un noeud non convergé n'élague rien et l'arbre épuisé ne prouve alors plus l'optimalité.
+    infos : dictionnaire optionnel rempli avec la borne, les incumbents et le statut d'optimalité
+    (infos['complet'] : tous les noeuds explorés ont convergé).
+    """
+    if infos is None:
+        infos = {}
+    debut = time.perf_counter()
+    demande = preparer_demande(quantites, demande, cout_surplus, surplus_max)
+    couts = demande['couts'] if demande['mode'] == "surplus" else None
+    resultats = plan_heuristique_optimal(longueurs, quantites, L, infos, callback)
+    if resultats is not None:
+        return resultats
+    borne_combinatoire = infos['borne_inferieure']
+    n = len(longueurs)
+
+    # Problème maître persistant : les bornes des variables changent d'un noeud à l'autre
+    colonnes = {}  # pattern (tuple de comptes) -> indice de colonne du maître
+    for p in generer_pattern_initial(longueurs, quantites, L):
+        colonnes.setdefault(tuple(compter_coupes(p, longueurs)), len(colonnes))
+    maitre = SOLVEURS_LP[solveur_lp](quantites, list(colonnes), demande['maximums'], couts)
+    # Variables artificielles (une par longueur) gardant le maître réalisable sous les bornes
+    artificielles = []
+    for j in range(n):
+        artificielles.append(maitre.nb_colonnes)
+        maitre.ajouter_colonne([int(k == j) for k in range(n)], cout=COUT_ARTIFICIEL)
+
+    def ajouter_colonne(pattern):
+        colonnes[pattern] = maitre.nb_colonnes
+        maitre.ajouter_colonne(pattern)
+
+    def valeur_objectif(solution):
+        return sum(k * cout_colonne(p, couts) for p, k in solution.items())
+
+    def resoudre_noeud(bornes_inf, bornes_sup):
+        """
+        Génération de colonnes sous les bornes du noeud.
+        Retourne (valeur LP, {pattern: x} ou None si le noeud est irréalisable, convergé).
+        Un noeud non convergé (max_iterations, budget de temps épuisé ou colonne déjà au
+        maître renvoyée par le pricing) n'a pas de valeur LP prouvée : elle ne borne rien.
+        """
+        maitre.changer_bornes(list(colonnes.values()), [bornes_inf.get(p, 0) for p in colonnes],
+                              [bornes_sup.get(p) for p in colonnes])
+        exclus = set(bornes_sup)
+
+        converge = False
+        for _ in range(max_iterations):
+            resultat = maitre.resoudre()
+            if resultat is None:
+                return math.inf, None, False  # échec du solveur LP
+            objectif, x, duals = resultat
+            duals = duals - demande['couts']
+            valeur, comptes = resoudre_sac_a_dos_borne(duals, longueurs, quantites, L)
+            if comptes is not None and tuple(comptes) in exclus:
+                valeur, comptes = resoudre_sac_a_dos_exclusions(duals, longueurs, quantites, L, exclus)
+            if comptes is None or 1 - valeur >= -TOLERANCE_PRICING:
+                converge = True
+                break
+            pattern = tuple(comptes)
+            if pattern in colonnes or time.perf_counter() - debut > temps_limite:
+                # Colonne déjà au maître (erreur numérique) ou budget épuisé : arrêt sans preuve
+                break
+            ajouter_colonne(pattern)
+
+        if x[artificielles].sum() > 1e-6:
+            return objectif, None, converge  # irréalisable, prouvé seulement si convergé
+        # Une colonne ajoutée à la dernière itération n'a pas encore de valeur
+        return objectif, {p: x[i] for p, i in colonnes.items() if i < len(x) and x[i] > 1e-9}, converge
+
+    meilleur = {'solution': None, 'nb_barres': math.inf, 'valeur': math.inf}
+    infos['incumbents'] = []
+
+    def proposer(solution):
+        valeur = valeur_objectif(solution)
+        if valeur < meilleur['valeur'] - 1e-9:
+            nb = sum(solution.values())
+            meilleur['solution'], meilleur['nb_barres'], meilleur['valeur'] = solution, nb, valeur
+            infos['incumbents'].append((time.perf_counter() - debut, nb))
+            if callback is not None:
+                callback(plan_depuis_solution(solution, longueurs, L), infos.get('borne_inferieure'))
+
+    # Pile des noeuds (exploration en profondeur) : (bornes inférieures, bornes supérieures)
+    pile = [({}, {})]
+    nb_noeuds = 0
+    borne_racine = None
+    complet = True  # tous les noeuds explorés ont convergé : pile vide = optimalité prouvée
+    while pile:
+        if nb_noeuds >= max_noeuds or time.perf_counter() - debut > temps_limite:
+            break
+        bornes_inf, bornes_sup = pile.pop()
+        nb_noeuds += 1
+
+        valeur_lp, x, converge = resoudre_noeud(bornes_inf, bornes_sup)
+        complet = complet and converge
+        # Coûts entiers (une barre par pattern) sauf coût de surplus ; pas de borne sans convergence
+        if not converge:
+            borne_noeud = -math.inf
+        else:
+            borne_noeud = math.ceil(valeur_lp - 1e-6) if couts is None else valeur_lp - 1e-6
+        if borne_racine is None:
+            borne_racine = max(borne_noeud, borne_combinatoire)
+            if converge:
+                infos['borne_lp'] = valeur_lp
+            infos['borne_inferieure'] = borne_racine if couts is None else borne_combinatoire
+        if x is None:
+            continue  # noeud irréalisable (ou abandonné, complet est alors faux)
+
+        # Incumbent : parties entières + demande résiduelle par FFD
+        proposer(completer_par_ffd({p: math.floor(v + 1e-9) for p, v in x.items() if v >= 1 - 1e-9},
+                                   longueurs, quantites, L))
+        if meilleur['valeur'] <= borne_racine + 1e-9:
+            break  # optimalité prouvée
+        if borne_noeud >= meilleur['valeur'] - 1e-9:
+            continue  # noeud élagué
+
+        fractionnaires = {p: v for p, v in x.items() if abs(v - round(v)) > 1e-6}
+        if not fractionnaires:
+            proposer({p: int(round(v)) for p, v in x.items() if round(v) > 0})
+            continue
+
+        # Branchement sur la variable la plus fractionnaire
+        p = min(fractionnaires, key=lambda q: abs(fractionnaires[q] - math.floor(fractionnaires[q]) - 0.5))
+        v = fractionnaires[p]
+        bas = dict(bornes_sup)
+        bas[p] = math.floor(v)
+        haut = dict(bornes_inf)
+        haut[p] = math.ceil(v)
+        pile.append((bornes_inf, bas))
+        pile.append((haut, bornes_sup))
+
+    infos['nb_noeuds'] = nb_noeuds
+    infos['nb_colonnes'] = len(colonnes)
+    infos['optimal'] = borne_racine is not None and (meilleur['valeur'] <= borne_racine + 1e-9 or (complet and not pile))
+    infos['complet'] = complet
+    infos['temps'] = time.perf_counter() - debut
+
+    if meilleur['solution'] is None:
+        return PlanDecoupe()
+    resultats = plan_depuis_solution(meilleur['solution'], longueurs, L)
+    resultats.infos = infos
+    return resultats
@@ -1,11 +1,24 @@
 # backend_dcg.py
 
-from docplex.mp.model import Model
-import random
+import numpy as np
+import math
+import time
+from collections import Counter
+from backend_heuristique import solution_heuristique, plan_heuristique_optimal, optimiser_decoupe_heuristique
+from backend_lp import SOLVEURS_LP
+from backend_bornes import borne_combinatoire
+from backend_presolve import verifier_commande
+from backend_demande import preparer_demande, DEMANDE_DEFAUT
+from backend_magasin import MagasinPatterns
+import logging
+
+logger = logging.getLogger(__name__)
 
 def generer_pattern_initial(longueurs, quantites, L):
     """
-    Génère un pattern initial utilisant une heuristique gloutonne
+    Génère les patterns initiaux utilisant une heuristique gloutonne.
+    Chaque pattern est répété d'un bloc tant que les quantités restantes le permettent
+    et n'apparaît qu'une fois : le coût ne dépend pas de l'ordre de grandeur des quantités.
     """
     patterns = []
     reste_quantites = quantites.copy()
@@ -27,96 +40,473 @@ def generer_pattern_initial(longueurs, quantites, L):
                 'cuts': pattern,
                 'waste': reste_L
             })
+            # Répétitions supplémentaires du même pattern
+            comptes = Counter(pattern)
+            repetitions = min(reste_quantites[longueurs.index(l)] // c for l, c in comptes.items())
+            for l, c in comptes.items():
+                reste_quantites[longueurs.index(l)] -= c * repetitions
     
     return patterns
 
-def calculer_couts_reduits(dual_values, longueurs, L):
+def resoudre_sac_a_dos_borne(valeurs, longueurs, bornes, L):
     """
-    Calcule le coût réduit pour chaque longueur et détermine si de nouveaux patterns doivent être générés
+    Résout exactement le sac à dos borné max sum(v_i * n_i) sous sum(l_i * n_i) <= L
+    et n_i <= bornes[i], par programmation dynamique sur la capacité.
+    Retourne (valeur, comptes).
     """
-    best_pattern = []
-    best_value = 0
-    reste_L = L
-    
-    # Trier les longueurs par valeur duale décroissante
-    indices_tries = sorted(range(len(longueurs)), key=lambda i: dual_values[i] / longueurs[i], reverse=True)
-    
-    # Construire le pattern avec la meilleure valeur duale
-    for i in indices_tries:
-        while reste_L >= longueurs[i]:
-            best_pattern.append(longueurs[i])
-            reste_L -= longueurs[i]
-            best_value += dual_values[i]
-    
-    # Si le coût réduit est positif, ajouter ce pattern
-    if best_value > 1:  # 1 est le coût d'une nouvelle barre
-        return True, best_pattern, reste_L
-    
-    return False, None, None
+    return resoudre_sac_a_dos_k_meilleurs(valeurs, longueurs, bornes, L, 1)[0]
 
-def optimiser_decoupe_dcg(longueurs, quantites, L=6000, max_iterations=100):
+def resoudre_sac_a_dos_k_meilleurs(valeurs, longueurs, bornes, L, k):
     """
-    Optimise la découpe de barres en utilisant la méthode de génération de colonnes (DCG)
+    Sac à dos borné résolu par programmation dynamique sur la capacité ; chaque longueur
+    est décomposée en lots binaires (1, 2, 4, ...) pour se ramener à un sac à dos 0/1.
+    Outre l'optimum (capacité L), la table donne pour chaque capacité c la meilleure
+    solution de poids <= c : les k meilleures solutions distinctes lues aux capacités où
+    la valeur augmente sont renvoyées, par valeur décroissante, en liste de (valeur, comptes).
     """
-    # Générer un ensemble initial de patterns
+    # Décomposition binaire des bornes : (indice de longueur, multiplicité)
+    lots = []
+    for i, (v, l) in enumerate(zip(valeurs, longueurs)):
+        borne = min(bornes[i], L // l)
+        if v <= 0 or borne <= 0:
+            continue
+        taille = 1
+        while borne > 0:
+            m = min(taille, borne)
+            lots.append((i, m))
+            borne -= m
+            taille *= 2
+
+    dp = np.zeros(L + 1)
+    choix = np.zeros((len(lots), L + 1), dtype=bool)
+    for t, (i, m) in enumerate(lots):
+        poids = longueurs[i] * m
+        if poids > L:
+            continue
+        candidat = dp[:-poids] + valeurs[i] * m
+        ameliore = candidat > dp[poids:] + 1e-12
+        choix[t, poids:] = ameliore
+        dp[poids:] = np.where(ameliore, candidat, dp[poids:])
+
+    def reconstruire(c):
+        comptes = [0] * len(longueurs)
+        for t in range(len(lots) - 1, -1, -1):
+            if choix[t, c]:
+                i, m = lots[t]
+                comptes[i] += m
+                c -= longueurs[i] * m
+        return comptes
+
+    # Reconstruction à partir de la capacité L, puis des capacités où la valeur augmente
+    solutions = [(float(dp[L]), reconstruire(L))]
+    if k > 1:
+        vues = {tuple(solutions[0][1])}
+        paliers = np.flatnonzero(np.diff(dp) > 1e-12) + 1
+        for c in paliers[np.argsort(-dp[paliers], kind="stable")]:
+            if len(solutions) >= k:
+                break
+            comptes = reconstruire(int(c))
+            if tuple(comptes) not in vues:
+                vues.add(tuple(comptes))
+                solutions.append((float(dp[c]), comptes))
+    return solutions
+
+def resoudre_sac_a_dos_exclusions(valeurs, longueurs, bornes, L, exclus):
+    """
+    Sac à dos borné dont la solution ne doit pas appartenir à l'ensemble exclus
+    (tuples de comptes). Séparation-évaluation en profondeur avec la relaxation
+    fractionnaire comme borne. Les longueurs de valeur nulle ou négative restent dans
+    la recherche (max(v, 0) dans la borne) : ajoutées à un pattern exclu, elles donnent
+    un pattern autorisé de même valeur ou presque. Retourne la meilleure solution de
+    valeur strictement positive (valeur, comptes), ou (0, None).
+    """
+    n = len(longueurs)
+    ordre = sorted(
+        (i for i in range(n) if min(bornes[i], L // longueurs[i]) > 0),
+        key=lambda i: valeurs[i] / longueurs[i], reverse=True
+    )
+    comptes = [0] * n
+    meilleur = [0.0, None]
+
+    def borne_fractionnaire(k, reste):
+        total = 0.0
+        for i in ordre[k:]:
+            if valeurs[i] <= 0:
+                break  # les suivantes ne rapportent rien non plus
+            prise = min(bornes[i], reste // longueurs[i])
+            total += prise * valeurs[i]
+            reste -= prise * longueurs[i]
+            if prise < bornes[i]:
+                return total + valeurs[i] * reste / longueurs[i]
+        return total
+
+    def explorer(k, reste, valeur):
+        if valeur + borne_fractionnaire(k, reste) <= meilleur[0] + 1e-12:
+            return
+        if k == len(ordre):
+            cle = tuple(comptes)
+            if cle not in exclus:
+                meilleur[0], meilleur[1] = valeur, cle
+            return
+        i = ordre[k]
+        for c in range(min(bornes[i], reste // longueurs[i]), -1, -1):
+            comptes[i] = c
+            explorer(k + 1, reste - c * longueurs[i], valeur + c * valeurs[i])
+        comptes[i] = 0
+
+    explorer(0, L, 0.0)
+    return meilleur[0], (list(meilleur[1]) if meilleur[1] is not None else None)
+
+def compter_coupes(pattern, longueurs):
+    """
+    Nombre de pièces de chaque longueur dans un pattern {'cuts', 'waste'}
+    """
+    compte = Counter(pattern['cuts'])
+    return [compte.get(l, 0) for l in longueurs]
+
+def calculer_couts_reduits(dual_values, longueurs, L, quantites=None, methode="dp"):
+    """
+    Cherche le pattern de coût réduit le plus négatif pour les valeurs duales données.
+    methode="dp" résout exactement le sac à dos borné (bornes = quantités demandées),
+    methode="glouton" remplit la barre par ratio valeur duale / longueur décroissant.
+    Retourne (nouveau_pattern_trouve, pattern, chute, cout_reduit).
+    """
+    if quantites is None:
+        quantites = [L // l for l in longueurs]
+
+    if methode == "dp":
+        best_value, comptes = resoudre_sac_a_dos_borne(dual_values, longueurs, quantites, L)
+        best_pattern = []
+        for i, n in enumerate(comptes):
+            best_pattern.extend([longueurs[i]] * n)
+    elif methode == "glouton":
+        best_pattern = []
+        best_value = 0
+        reste_L = L
+        restants = list(quantites)
+
+        # Trier les longueurs par valeur duale décroissante
+        indices_tries = sorted(range(len(longueurs)), key=lambda i: dual_values[i] / longueurs[i], reverse=True)
+
+        # Construire le pattern avec la meilleure valeur duale
+        for i in indices_tries:
+            while restants[i] > 0 and reste_L >= longueurs[i]:
+                best_pattern.append(longueurs[i])
+                reste_L -= longueurs[i]
+                restants[i] -= 1
+                best_value += dual_values[i]
+    else:
+        raise ValueError(f"Méthode de pricing inconnue : {methode}")
+
+    cout_reduit = 1 - best_value  # 1 est le coût d'une nouvelle barre
+
+    # Si le coût réduit est négatif, ajouter ce pattern
+    if cout_reduit < -1e-9:
+        return True, best_pattern, L - sum(best_pattern), cout_reduit
+
+    return False, None, None, cout_reduit
+
+def plan_arrondi_superieur(x, magasin):
+    """
+    Plan réalisable obtenu en arrondissant à l'entier supérieur la solution x du maître
+    (colonnes du magasin)
+    """
+    return magasin.plan(np.ceil(np.asarray(x) - 1e-9).astype(np.int64))
+
+def borne_lp(longueurs, quantites, L, max_iterations=200, solveur_lp="highs", temps_limite=None):
+    """
+    Borne inférieure de programmation linéaire : ceil(z_LP) obtenue par génération de colonnes
+    avec pricing exact. Si les itérations ou le temps (temps_limite, en secondes) s'épuisent
+    avant convergence, la borne de Farley (toujours valable) est renvoyée.
+    """
+    depart = time.perf_counter()
     patterns = generer_pattern_initial(longueurs, quantites, L)
-    
+    maitre = SOLVEURS_LP[solveur_lp](quantites, [compter_coupes(p, longueurs) for p in patterns])
+    borne = 0
+    for _ in range(max_iterations):
+        if temps_limite is not None and time.perf_counter() - depart > temps_limite:
+            break
+        solution = maitre.resoudre()
+        if solution is None:
+            break
+        objectif, _, dual_values = solution
+        valeur, comptes = resoudre_sac_a_dos_borne(dual_values, longueurs, quantites, L)
+        borne = max(borne, math.ceil(objectif / max(valeur, 1) - 1e-6))
+        if valeur <= 1 + 1e-9:
+            break
+        maitre.ajouter_colonne(comptes)
+    return borne
+
+def reparer_arrondi_inferieur(x, magasin, longueurs, quantites, L, residuel="exact", temps_limite=None,
+                              demande=DEMANDE_DEFAUT):
+    """
+    Arrondit à l'entier inférieur la solution x du maître puis découpe la demande
+    résiduelle (petite : au plus une barre par pattern fractionnaire) par un sous-problème
+    exact (génération de colonnes + problème entier, en mode de demande demande) ou par
+    FFD (residuel="heuristique").
+    Retourne le plan complet.
+    """
+    usages = np.floor(np.asarray(x) + 1e-9).astype(np.int64)
+    plan = magasin.plan(usages)
+    residu = (np.asarray(quantites) - usages @ magasin.comptes[:len(usages)]).tolist()
+
+    indices = [j for j in range(len(longueurs)) if residu[j] > 0]
+    if indices:
+        sous_longueurs = [longueurs[j] for j in indices]
+        sous_quantites = [residu[j] for j in indices]
+        if residuel == "exact":
+            sous_plan = optimiser_decoupe_dcg(sous_longueurs, sous_quantites, L, temps_limite=temps_limite,
+                                              demande=demande)
+        else:
+            sous_plan = optimiser_decoupe_heuristique(sous_longueurs, sous_quantites, L)
+        for entree in sous_plan.entrees:
+            plan.ajouter(entree.pattern, entree.multiplicite)
+    return plan
+
+def optimiser_decoupe_dcg(longueurs, quantites, L=6000, max_iterations=100, pricing="dp",
+                          temps_limite=None, callback=None, infos=None, solveur_lp="highs",
+                          mode="entier", residuel="exact", k_colonnes=5, age_max=20, stabilisation=None,
+                          demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None):
+    """
+    Optimise la découpe de barres en utilisant la méthode de génération de colonnes (DCG)
+    pricing : "dp" (sac à dos borné exact) ou "glouton".
+    demande : "au_moins" (par défaut), "exacte" ou "surplus" (voir backend_demande) ; le
+    pricing porte alors sur les duals diminués du coût de surplus de chaque pièce. L'arrondi
+    supérieur du maître n'est un plan réalisable qu'en demande "au_moins", et la borne de
+    Farley n'est calculée que sans coût de surplus.
+    k_colonnes : nombre maximal de colonnes améliorantes ajoutées par tour (pricing "dp").
+    age_max : une colonne nulle dans la solution du maître depuis age_max tours est retirée
+    du maître vers un pool, où elle est de nouveau évaluée à chaque tour avant le sac à dos
+    (None : aucune colonne n'est retirée).
+    stabilisation : coefficient a de lissage des duals (Wentges) dans [0, 1[, par exemple 0.8 ;
+    None désactive la stabilisation (pricing "dp" uniquement).
+    solveur_lp : backend du maître et du problème entier final, clé de SOLVEURS_LP
+    ("highs" par défaut, libre et sans limite de taille ; "cplex" via docplex).
+    temps_limite : budget en secondes partagé entre la génération de colonnes et la résolution entière.
+    callback(plan, borne) est appelé à chaque plan amélioré (arrondi du maître puis solution entière).
+    Le problème entier final part du meilleur plan entre FFD et l'arrondi du maître (MIP start).
+    Arrêt anticipé dès que le plan FFD ou l'arrondi du maître atteint la meilleure borne
+    inférieure (combinatoire ou de Farley).
+    mode="arrondi" (grandes quantités) : pas de problème entier final ; la solution LP est
+    arrondie à l'inférieur et la demande résiduelle découpée à part (residuel="exact" ou
+    "heuristique"). Le temps de calcul ne dépend alors presque plus des quantités.
+    infos : dictionnaire optionnel rempli avec les coûts réduits trouvés à chaque itération
+    et les temps de résolution du maître / du pricing par itération, ainsi que la taille du
+    maître et du pool à chaque tour ; en mode "arrondi",
+    infos['barres_supplementaires'] est l'écart du plan à la borne LP.
+    """
+    if infos is None:
+        infos = {}
+    if stabilisation is not None and not 0 <= stabilisation < 1:
+        raise ValueError(f"Coefficient de stabilisation hors de [0, 1[ : {stabilisation}")
+    demande = preparer_demande(quantites, demande, cout_surplus, surplus_max)
+    arrondi_realisable = demande['mode'] == "au_moins"
+    farley = demande['mode'] != "surplus"
+    infos['couts_reduits'] = []
+    if mode == "arrondi":
+        # Pas de FFD préalable : son coût croît avec le nombre de pièces
+        verifier_commande(longueurs, quantites, L)
+        infos['borne_inferieure'] = borne_combinatoire(longueurs, quantites, L)
+    else:
+        resultats = plan_heuristique_optimal(longueurs, quantites, L, infos, callback)
+        if resultats is not None:
+            return resultats
+    depart = time.perf_counter()
+    meilleur_nb = math.inf
+    borne = infos['borne_inferieure']
+    solution = None
+
+    # Générer un ensemble initial de patterns (colonnes du maître, rangées dans un magasin)
+    colonnes = MagasinPatterns(longueurs, L, [compter_coupes(p, longueurs)
+                                              for p in generer_pattern_initial(longueurs, quantites, L)])
+    infos['temps_maitre'] = []
+    infos['temps_pricing'] = []
+    infos['taille_maitre'] = []
+    infos['taille_pool'] = []
+
+    # Problème maître restreint, construit une seule fois puis enrichi colonne par colonne
+    maitre = SOLVEURS_LP[solveur_lp](quantites, colonnes.comptes.tolist(),
+                                     demande['maximums'], demande['couts'] if demande['mode'] == "surplus" else None)
+    ages = [0] * len(colonnes)  # tours consécutifs à valeur nulle dans le maître
+    quantites_demandees = np.asarray(quantites, dtype=float)
+    centre = None  # centre de stabilisation des duals
+    meilleure_borne_lissee = 0.0
+    infos['mauvais_pricing'] = 0
+    pool = MagasinPatterns(longueurs, L)  # colonnes retirées du maître
+
+    def ajouter_pattern(comptes):
+        colonnes.ajouter(comptes)
+        ages.append(0)
+        maitre.ajouter_colonne([int(c) for c in comptes])
+
     for iteration in range(max_iterations):
-        # Résoudre le problème maître restreint
-        mdl = Model("master_problem")
-        x = [mdl.continuous_var(name=f"x_{i}") for i in range(len(patterns))]
-        
-        # Contraintes: satisfaire les quantités demandées
-        for j, l in enumerate(longueurs):
-            mdl.add_constraint(
-                mdl.sum(x[i] * patterns[i]['cuts'].count(l) for i in range(len(patterns))) >= quantites[j],
-                name=f"demand_{j}"
-            )
-        
-        # Objectif: minimiser le nombre de barres utilisées
-        mdl.minimize(mdl.sum(x[i] for i in range(len(patterns))))
-        
-        solution = mdl.solve()
-        
-        if not solution:
+        if temps_limite is not None and time.perf_counter() - depart > temps_limite:
             break
+
+        # Vieillissement : les colonnes inutilisées depuis age_max tours passent dans le pool
+        if age_max is not None:
+            retirees = [i for i, age in enumerate(ages) if age >= age_max]
+            if retirees:
+                maitre.retirer_colonnes(retirees)
+                for comptes in colonnes.retirer(retirees):
+                    pool.ajouter(comptes)
+                ages[:] = [age for age in ages if age < age_max]
+
+        # Résoudre le problème maître restreint (le solveur repart de la base précédente)
+        debut = time.perf_counter()
+        solution = maitre.resoudre()
+        infos['temps_maitre'].append(time.perf_counter() - debut)
         
-        # Récupérer les valeurs duales
-        dual_values = [mdl.dual_values(c) for c in mdl.iter_constraints()]
+        if solution is None:
+            break
+        objectif, x, dual_values = solution
+        # Valeur d'une pièce pour le pricing : son dual moins son coût de surplus
+        valeurs = dual_values - demande['couts']
+        infos['borne_lp'] = objectif
+        infos['iterations'] = iteration + 1
+        ages[:] = [0 if v > 1e-9 else age + 1 for age, v in zip(ages, x)]
+        infos['taille_maitre'].append(len(colonnes))
+        infos['taille_pool'].append(len(pool))
+        logger.info("dcg : tour %s, %s colonnes dans le maître, %s dans le pool, objectif %.4f",
+                    iteration + 1, len(colonnes), len(pool), objectif)
+
+        plan = plan_arrondi_superieur(x, colonnes) if arrondi_realisable else None
+        if callback is not None and plan is not None and len(plan) < meilleur_nb:
+            meilleur_nb = len(plan)
+            callback(plan, borne)
         
-        # Générer un nouveau pattern avec un coût réduit positif
-        has_new_pattern, new_pattern, waste = calculer_couts_reduits(dual_values, longueurs, L)
+        # Les colonnes du pool redevenues améliorantes reviennent d'abord dans le maître
+        debut = time.perf_counter()
+        if len(pool):
+            couts_pool = 1 - pool.comptes @ valeurs
+            revenues = [int(r) for r in np.argsort(couts_pool)[:k_colonnes] if couts_pool[r] < -1e-9]
+            if revenues:
+                for comptes in pool.retirer(revenues):
+                    ajouter_pattern(comptes)
+                infos['temps_pricing'].append(time.perf_counter() - debut)
+                infos['couts_reduits'].append(float(couts_pool.min()))
+                continue
+
+        # Générer les nouveaux patterns de coût réduit négatif
+        if pricing == "dp" and stabilisation:
+            # Lissage de Wentges : pricing au point pi = a * centre + (1 - a) * duals du maître ;
+            # en cas de mauvais pricing (aucune colonne améliorante pour les vrais duals),
+            # a est diminué de 1 - a par pas jusqu'à 0 (pricing exact) sans résoudre de nouveau
+            # le maître ; alpha est recalculé à partir du pas pour atteindre 0 exactement
+            if centre is None:
+                centre = valeurs
+            pas_max = math.ceil(stabilisation / (1 - stabilisation) - 1e-9)
+            pas = 0
+            while True:
+                alpha = 0.0 if pas >= pas_max else stabilisation - pas * (1 - stabilisation)
+                duals_lisses = alpha * centre + (1 - alpha) * valeurs
+                candidats = resoudre_sac_a_dos_k_meilleurs(duals_lisses, longueurs, quantites, L, k_colonnes)
+                # Borne lagrangienne (Farley) au point lissé : le centre suit la meilleure
+                if candidats[0][0] > 1e-9:
+                    borne_lissee = float(duals_lisses @ quantites_demandees) / candidats[0][0]
+                    if borne_lissee > meilleure_borne_lissee:
+                        meilleure_borne_lissee, centre = borne_lissee, duals_lisses
+                couts = [1 - float(valeurs @ np.asarray(comptes)) for _, comptes in candidats]
+                nouveaux = [comptes for (_, comptes), c in zip(candidats, couts) if c < -1e-9]
+                if nouveaux or pas >= pas_max:
+                    break
+                infos['mauvais_pricing'] += 1
+                pas += 1
+            pricing_exact = pas >= pas_max
+            cout_reduit = min(couts)
+            if farley:
+                borne = max(borne, math.ceil(meilleure_borne_lissee - 1e-6))
+        elif pricing == "dp":
+            candidats = resoudre_sac_a_dos_k_meilleurs(valeurs, longueurs, quantites, L, k_colonnes)
+            cout_reduit = 1 - candidats[0][0]
+            nouveaux = [comptes for valeur, comptes in candidats if 1 - valeur < -1e-9]
+        else:
+            has_new_pattern, new_pattern, waste, cout_reduit = calculer_couts_reduits(
+                valeurs, longueurs, L, quantites, methode=pricing
+            )
+            nouveaux = [compter_coupes({'cuts': new_pattern}, longueurs)] if has_new_pattern else []
+        infos['temps_pricing'].append(time.perf_counter() - debut)
+        infos['couts_reduits'].append(cout_reduit)
+
+        # Borne de Farley : z_LP >= z_maître / (1 - coût réduit minimal), valable si le pricing est exact
+        if farley and pricing == "dp" and (not stabilisation or pricing_exact):
+            borne = max(borne, math.ceil(objectif / (1 - min(cout_reduit, 0)) - 1e-6))
+        infos['borne_inferieure'] = borne
+
+        if plan is not None and len(plan) <= borne:
+            # L'arrondi du maître atteint la borne : optimal, inutile de poursuivre
+            infos['optimal'] = True
+            plan.infos = infos
+            return plan
         
-        if not has_new_pattern:
+        if not nouveaux:
             break  # Aucun nouveau pattern à ajouter
         
-        # Ajouter le nouveau pattern
-        patterns.append({
-            'cuts': new_pattern,
-            'waste': waste
-        })
-    
-    # Résoudre le problème final avec variables entières
-    mdl = Model("final_problem")
-    x = [mdl.integer_var(name=f"x_{i}") for i in range(len(patterns))]
-    
-    # Contraintes: satisfaire les quantités demandées
-    for j, l in enumerate(longueurs):
-        mdl.add_constraint(
-            mdl.sum(x[i] * patterns[i]['cuts'].count(l) for i in range(len(patterns))) >= quantites[j]
-        )
-    
-    # Objectif: minimiser le nombre de barres utilisées
-    mdl.minimize(mdl.sum(x[i] for i in range(len(patterns))))
+        # Ajouter les nouveaux patterns (seules les nouvelles colonnes sont transmises au solveur)
+        for comptes in nouveaux:
+            ajouter_pattern(comptes)
+
+    # Le problème entier dispose aussi des colonnes du pool
+    for comptes in pool.comptes:
+        ajouter_pattern(comptes)
     
-    solution = mdl.solve()
+    if mode == "arrondi" and solution is not None:
+        reste = None
+        if temps_limite is not None:
+            reste = max(temps_limite - (time.perf_counter() - depart), 1)
+        # Demande résiduelle exacte hors mode "au_moins" : les plafonds de surplus restent respectés
+        resultats = reparer_arrondi_inferieur(solution[1], colonnes, longueurs, quantites, L, residuel, reste,
+                                              "au_moins" if arrondi_realisable else "exacte")
+        if plan is not None and len(resultats) > len(plan):
+            resultats = plan  # l'arrondi supérieur du maître fait mieux
+        infos['barres_supplementaires'] = len(resultats) - math.ceil(infos['borne_lp'] - 1e-6)
+        infos['optimal'] = len(resultats) <= borne
+        logger.info("dcg (arrondi) : %s barres, %s de plus que la borne LP", len(resultats), infos['barres_supplementaires'])
+        resultats.infos = infos
+        if callback is not None and len(resultats) <= meilleur_nb:
+            callback(resultats, borne)
+        return resultats
+
+    # Point de départ du problème entier : le meilleur entre FFD et l'arrondi du dernier maître
+    depart_mip = {}
+    for pattern, n in solution_heuristique(longueurs, quantites, L).items():
+        i = colonnes.indice(pattern)
+        if i is None:
+            i = colonnes.ajouter(pattern)
+            maitre.ajouter_colonne(list(pattern))
+        depart_mip[i] = n
+    if solution is not None and arrondi_realisable:
+        arrondi = {i: math.ceil(v - 1e-9) for i, v in enumerate(solution[1]) if v > 1e-9}
+        if sum(arrondi.values()) < sum(depart_mip.values()):
+            depart_mip = arrondi
+
+    # Résoudre le problème final avec variables entières, sur les mêmes colonnes
+    reste = None
+    if temps_limite is not None:
+        reste = max(temps_limite - (time.perf_counter() - depart), 1)
+    infos['objectif_depart'] = sum(depart_mip.values())
+    x = maitre.resoudre_entier(depart_mip, reste)
+    infos['objectif_final'] = int(x.sum()) if x is not None else None
+    logger.info("dcg : objectif de départ %s, objectif final %s", infos['objectif_depart'], infos['objectif_final'])
     
-    resultats = []
-    if solution:
-        for i in range(len(patterns)):
-            quantite = int(solution[x[i]])
-            if quantite > 0:
-                for _ in range(quantite):
-                    resultats.append(patterns[i])
+    if x is not None:
+        colonnes.usages[:] = np.rint(x).astype(np.int64)
+    resultats = colonnes.plan()
+    resultats.infos = infos
+
+    infos['optimal'] = x is not None and len(resultats) <= borne
+    if callback is not None and resultats and len(resultats) <= meilleur_nb:
+        callback(resultats, borne)
     
-    return resultats
\ No newline at end of file
+    return resultats
+
+def optimiser_decoupe_grandes_quantites(longueurs, quantites, L=6000, temps_limite=None, callback=None,
+                                        infos=None, residuel="exact", demande=DEMANDE_DEFAUT, cout_surplus=0.0,
+                                        surplus_max=None):
+    """
+    Mode grandes quantités : relaxation LP par génération de colonnes jusqu'à convergence,
+    arrondi inférieur des multiplicités et découpe séparée de la petite demande résiduelle.
+    """
+    return optimiser_decoupe_dcg(longueurs, quantites, L, max_iterations=1000, temps_limite=temps_limite,
+                                 callback=callback, infos=infos, mode="arrondi", residuel=residuel,
+                                 demande=demande, cout_surplus=cout_surplus, surplus_max=surplus_max)
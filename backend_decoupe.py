@@ -1,51 +1,148 @@
 # backend_decoupe_pulp.py
 
-from pulp import LpProblem, LpVariable, LpMinimize, lpSum, LpInteger, PULP_CBC_CMD, value
-import itertools
+from pulp import (LpProblem, LpVariable, LpMinimize, LpInteger, PULP_CBC_CMD, value,
+                  LpAffineExpression, LpConstraint, LpConstraintEQ, LpConstraintGE, LpConstraintLE,
+                  LpSolutionOptimal, LpSolutionIntegerFeasible)
+from scipy.sparse import csr_matrix
+import numpy as np
+import time
+from backend_heuristique import solution_heuristique, plan_heuristique_optimal
+from backend_demande import preparer_demande, couts_colonnes, DEMANDE_DEFAUT
+from backend_bibliotheque import BIBLIOTHEQUE
+from backend_magasin import MagasinPatterns, MagasinDisque
+from backend_enumeration import enumerer_magasin
+from backend_estimation import verifier_enumeration
+import logging
 
-def generer_patterns(longueurs, L):
-    patterns = []
-    max_coupes = [L // l for l in longueurs]
-    
-    for n_coupes in itertools.product(*[range(max_coupes[i]+1) for i in range(len(longueurs))]):
-        longueur_totale = sum(n_coupes[i] * longueurs[i] for i in range(len(longueurs)))
-        if 0 < longueur_totale <= L:
-            patterns.append((n_coupes, L - longueur_totale))
-    return patterns
-
-def optimiser_decoupe(longueurs, quantites, L=6000):
-    patterns = generer_patterns(longueurs, L)
-    
-    # Création du modèle
-    mdl = LpProblem("decoupe", LpMinimize)
-    
-    # Variables de décision (nombre d'utilisation de chaque pattern)
-    x = [LpVariable(f"x_{i}", lowBound=0, cat=LpInteger) for i in range(len(patterns))]
-    
-    # Contraintes : satisfaire exactement les quantités demandées
-    for j, l in enumerate(longueurs):
-        mdl += lpSum(x[i] * patterns[i][0][j] for i in range(len(patterns))) == quantites[j]
+logger = logging.getLogger(__name__)
+
+def generer_patterns(longueurs, L, quantites=None, maximaux=False, stockage="memoire", dossier=None,
+                     dossier_bibliotheque=None, processus=1, infos=None):
+    """
+    Magasin (backend_magasin) des patterns réalisables, servi par la bibliothèque de
+    patterns partagée : seul un nouveau jeu de longueurs (ou des quantités plus grandes que
+    celles déjà vues) déclenche une énumération.
+    stockage="disque" : les patterns sont énumérés par blocs dans un MagasinDisque
+    (fichiers projetés en mémoire dans dossier, temporaire par défaut), hors bibliothèque.
+    dossier_bibliotheque : persistance sur disque des entrées de la bibliothèque (None :
+    mémoire seule). Les énumérations utilisent processus processus ; leur bilan par tranche
+    est rangé dans infos['enumeration'] (dictionnaire optionnel de l'appelant). Une énumération
+    dont la taille estimée dépasse LIMITE_PATTERNS est refusée (ValueError) avant de commencer.
+    """
+    verifier_enumeration(longueurs, quantites, L, maximaux, stockage)
+    if stockage == "disque" or len(set(longueurs)) != len(longueurs):
+        bilan = {}
+        if infos is not None:
+            infos['enumeration'] = bilan
+    if stockage == "disque":
+        return enumerer_magasin(MagasinDisque(longueurs, L, dossier), longueurs, L, quantites, maximaux,
+                                processus, bilan)
+    if len(set(longueurs)) != len(longueurs):
+        # Longueurs en double : colonnes distinctes, hors du cache indexé par longueur
+        return enumerer_magasin(MagasinPatterns(longueurs, L), longueurs, L, quantites, maximaux,
+                                processus, bilan)
+    comptes, chutes = BIBLIOTHEQUE.patterns(longueurs, L, quantites, maximaux, dossier=dossier_bibliotheque,
+                                            processus=processus, infos=infos)
+    return MagasinPatterns(longueurs, L, comptes, chutes)
+
+def indexer_depart(magasin, depart):
+    """
+    Associe chaque pattern d'une solution de départ {comptes: multiplicité} à son indice
+    dans le magasin, en l'ajoutant s'il n'a pas été énuméré. Retourne {indice: multiplicité}.
+    """
+    valeurs = {}
+    for pattern, n in depart.items():
+        i = magasin.indice(pattern)
+        if i is None:
+            i = magasin.ajouter(pattern)
+        valeurs[i] = n
+    return valeurs
+
+def construire_modele_creux(matrice, couts, quantites, sens=LpConstraintEQ, nom="decoupe", maximums=None):
+    """
+    Modèle PuLP min couts.x sous matrice.x (sens) quantites, x entier >= 0, construit
+    directement à partir des non-zéros de la matrice CSR (aucun terme à coefficient nul).
+    maximums : plafonds optionnels de production par longueur (None : pas de plafond).
+    Retourne (modèle, variables).
+    """
+    matrice = csr_matrix(matrice)
+    mdl = LpProblem(nom, LpMinimize)
+    x = [LpVariable(f"x_{i}", lowBound=0, cat=LpInteger) for i in range(matrice.shape[1])]
+
+    for j in range(matrice.shape[0]):
+        debut, fin = matrice.indptr[j], matrice.indptr[j + 1]
+        expression = LpAffineExpression(
+            (x[i], int(c)) for i, c in zip(matrice.indices[debut:fin], matrice.data[debut:fin])
+        )
+        mdl += LpConstraint(expression, sens, f"demande_{j}", quantites[j])
+        if maximums is not None and maximums[j] is not None:
+            mdl += LpConstraint(expression, LpConstraintLE, f"plafond_{j}", maximums[j])
+
+    couts = np.asarray(couts)
+    mdl += LpAffineExpression((x[i], float(couts[i])) for i in np.flatnonzero(couts))
+    return mdl, x
+
+def optimiser_decoupe(longueurs, quantites, L=6000, temps_limite=None, callback=None, infos=None,
+                      demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None, dossier_bibliotheque=None,
+                      processus=1):
+    """
+    Optimise la découpe de barres sur l'ensemble des patterns énumérés (PuLP / CBC).
+    demande : "exacte" (chute minimale), "au_moins" (nombre de barres minimal, seuls les
+    patterns maximaux sont énumérés) ou "surplus" (barres + cout_surplus par pièce en trop,
+    au plus surplus_max pièces en trop), voir backend_demande.preparer_demande.
+    temps_limite : budget en secondes donné à CBC ; la meilleure solution trouvée est renvoyée.
+    callback(plan, borne) est appelé avec le plan final.
+    Le modèle part de la solution FFD (MIP start) ; les objectifs de départ et final
+    sont journalisés et rangés dans infos, avec les temps de construction et de résolution.
+    dossier_bibliotheque, processus : persistance et parallélisme de l'énumération (generer_patterns),
+    dont le bilan est rangé dans infos['enumeration'].
+    Si le plan FFD atteint la borne inférieure combinatoire, il est renvoyé sans résolution.
+    """
+    if infos is None:
+        infos = {}
+    demande = preparer_demande(quantites, demande, cout_surplus, surplus_max)
+    resultats = plan_heuristique_optimal(longueurs, quantites, L, infos, callback)
+    if resultats is not None:
+        return resultats
+    # Surproduction gratuite : un pattern non maximal est dominé par un pattern maximal
+    magasin = generer_patterns(longueurs, L, quantites, maximaux=demande['mode'] == "au_moins",
+                               dossier_bibliotheque=dossier_bibliotheque, processus=processus, infos=infos)
+    depart = indexer_depart(magasin, solution_heuristique(longueurs, quantites, L))
     
-    # Objectif : minimiser la somme des chutes
-    mdl += lpSum(x[i] * patterns[i][1] for i in range(len(patterns)))
+    # Création du modèle à partir de la matrice creuse : satisfaire les quantités
+    # demandées (exactement ou au moins) au moindre coût
+    debut = time.perf_counter()
+    matrice = magasin.matrice()
+    couts = couts_colonnes(matrice, magasin.chutes, demande)
+    sens = LpConstraintEQ if demande['mode'] == "exacte" else LpConstraintGE
+    maximums = demande['maximums'] if demande['mode'] == "surplus" else None
+    mdl, x = construire_modele_creux(matrice, couts, quantites, sens, maximums=maximums)
+    infos['temps_construction'] = time.perf_counter() - debut
+
+    # Point de départ heuristique
+    for i, var in enumerate(x):
+        var.setInitialValue(depart.get(i, 0))
+    infos['objectif_depart'] = sum(n * couts[i] for i, n in depart.items())
     
     # Résoudre
-    solver = PULP_CBC_CMD(msg=0)  # msg=0 pour ne pas afficher les logs
+    solver = PULP_CBC_CMD(msg=0, timeLimit=temps_limite, warmStart=True)  # msg=0 pour ne pas afficher les logs
+    debut = time.perf_counter()
     mdl.solve(solver)
+    infos['temps_resolution'] = time.perf_counter() - debut
+    infos['optimal'] = mdl.sol_status == LpSolutionOptimal
+    infos['objectif_final'] = value(mdl.objective)
+    logger.info("decoupe : objectif de départ %s, objectif final %s (construction %.2f s, résolution %.2f s)",
+                infos['objectif_depart'], infos['objectif_final'], infos['temps_construction'], infos['temps_resolution'])
     
-    resultats = []
-    if mdl.status == 1:  # status 1 = optimal
-        for i in range(len(patterns)):
-            quantite = int(value(x[i]))
-            if quantite > 0:
-                coupure = []
-                for j, n in enumerate(patterns[i][0]):
-                    coupure.extend([longueurs[j]] * n)  # répéter la longueur n fois
-                for _ in range(quantite):  # répéter le pattern complet quantite fois
-                    resultats.append({
-                        'cuts': coupure,
-                        'waste': patterns[i][1]
-                    })
+    if mdl.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        magasin.usages[:] = [int(round(value(var))) for var in x]
+    resultats = magasin.plan()
+    resultats.infos = infos
+
+    # Sauf coût de surplus, l'optimum du modèle minimise le nombre de barres
+    if callback is not None and resultats:
+        optimal_barres = infos['optimal'] and demande['mode'] != "surplus"
+        callback(resultats, len(resultats) if optimal_barres else infos['borne_inferieure'])
     return resultats
 
 # Exemple de résultats
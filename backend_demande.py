@@ -0,0 +1,57 @@
+# backend_demande.py
+
+import numpy as np
+
+MODES_DEMANDE = ("exacte", "au_moins", "surplus")
+DEMANDE_DEFAUT = "au_moins"  # mode de tous les moteurs quand aucun n'est précisé
+
+def valeurs_par_longueur(valeur, n):
+    """Une valeur par longueur à partir d'un scalaire (répété) ou d'une liste"""
+    if valeur is None or np.isscalar(valeur):
+        return [valeur] * n
+    valeur = list(valeur)
+    if len(valeur) != n:
+        raise ValueError(f"{len(valeur)} valeurs données pour {n} longueurs")
+    return valeur
+
+def preparer_demande(quantites, demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None):
+    """
+    Bornes de production et coût des pièces en trop selon le mode de demande :
+    - "exacte" : chaque longueur est produite exactement en la quantité demandée ;
+    - "au_moins" : au moins la quantité demandée, les pièces en trop sont gratuites ;
+    - "surplus" : entre la quantité demandée et quantité + surplus_max (None : sans plafond),
+      chaque pièce en trop coûtant cout_surplus, exprimé en barres (0.05 : 1/20 de barre).
+    cout_surplus et surplus_max sont des scalaires ou des listes (une valeur par longueur).
+    Retourne {'mode', 'minimums', 'maximums' (None : illimité), 'couts'}.
+    """
+    if demande not in MODES_DEMANDE:
+        raise ValueError(f"Mode de demande inconnu : {demande}")
+    n = len(quantites)
+    minimums = list(quantites)
+    if demande == "exacte":
+        maximums = list(quantites)
+    elif demande == "au_moins":
+        maximums = [None] * n
+    else:
+        maximums = [None if m is None else q + m for q, m in zip(quantites, valeurs_par_longueur(surplus_max, n))]
+    couts = valeurs_par_longueur(cout_surplus if demande == "surplus" else 0.0, n)
+    if any(c < 0 for c in couts):
+        raise ValueError("Le coût d'une pièce en surplus doit être positif ou nul")
+    return {'mode': demande, 'minimums': minimums, 'maximums': maximums,
+            'couts': np.asarray(couts, dtype=float)}
+
+def couts_colonnes(matrice, chutes, demande):
+    """
+    Coût de chaque pattern (colonnes de la matrice longueurs x patterns) :
+    sa chute en demande exacte (même optimum que le nombre de barres, mieux conditionné
+    pour CBC), une barre en demande "au_moins", une barre plus le coût de ses pièces
+    en mode "surplus" (le coût constant des pièces demandées est omis).
+    """
+    if demande['mode'] == "exacte":
+        return np.asarray(chutes, dtype=float)
+    return 1 + np.asarray(matrice.T @ demande['couts']).ravel()
+
+def bornes_lignes(demande):
+    """Bornes (inférieures, supérieures) des lignes de demande, inf si illimité"""
+    return (np.asarray(demande['minimums'], dtype=float),
+            np.array([np.inf if m is None else m for m in demande['maximums']], dtype=float))
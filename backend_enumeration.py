@@ -0,0 +1,163 @@
+# backend_enumeration.py
+
+import heapq
+import logging
+import math
+import multiprocessing
+import time
+import numpy as np
+from backend_estimation import estimer_taille, SEUIL_PARALLELE
+
+logger = logging.getLogger(__name__)
+
+def bornes_et_ordre(longueurs, L, quantites=None):
+    """
+    Nombre maximal de pièces de chaque longueur dans une barre et ordre d'exploration
+    (longueurs décroissantes : les grandes pièces épuisent vite la capacité)
+    """
+    if quantites is None:
+        bornes = [L // l for l in longueurs]
+    else:
+        bornes = [min(q, L // l) for q, l in zip(quantites, longueurs)]
+    ordre = sorted(range(len(longueurs)), key=lambda i: longueurs[i], reverse=True)
+    return bornes, ordre
+
+def enumerer_patterns(longueurs, L, quantites=None, maximaux=False, prefixe=()):
+    """
+    Énumère paresseusement les patterns réalisables (n_coupes, chute) par une
+    recherche en profondeur élaguée sur la capacité restante.
+    quantites : plafonne le nombre de chaque longueur à la quantité demandée.
+    maximaux : ne produit que les patterns où plus aucune pièce autorisée ne rentre.
+    prefixe : nombres de pièces imposés aux premières longueurs dans l'ordre décroissant
+    (une tranche de l'énumération, voir tranches_enumeration).
+    """
+    n = len(longueurs)
+    bornes, ordre = bornes_et_ordre(longueurs, L, quantites)
+    # Longueur maximale consommable par les longueurs restant à décider
+    capacite_suffixe = [0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        i = ordre[k]
+        capacite_suffixe[k] = capacite_suffixe[k + 1] + bornes[i] * longueurs[i]
+
+    n_coupes = [0] * n
+
+    def explorer(k, reste, seuil):
+        # seuil : plus petite longueur déjà décidée non saturée (pour la maximalité)
+        if maximaux and reste - capacite_suffixe[k] >= seuil:
+            return
+        if k == n:
+            if reste < L and (not maximaux or reste < seuil):
+                yield tuple(n_coupes), reste
+            return
+        i = ordre[k]
+        l = longueurs[i]
+        maxi = min(bornes[i], reste // l)
+        for c in range(maxi, -1, -1):
+            n_coupes[i] = c
+            yield from explorer(k + 1, reste - c * l, seuil if c == bornes[i] else min(seuil, l))
+        n_coupes[i] = 0
+
+    reste, seuil = L, L + 1
+    for i, c in zip(ordre, prefixe):
+        n_coupes[i] = c
+        reste -= c * longueurs[i]
+        if c < bornes[i]:
+            seuil = min(seuil, longueurs[i])
+    yield from explorer(len(prefixe), reste, seuil)
+
+
+def tranches_enumeration(longueurs, L, quantites=None, nombre=8, nombre_max=None):
+    """
+    Partition de l'énumération en tranches disjointes, chacune fixant les nombres de pièces
+    des plus grandes longueurs (prefixe). La tranche de taille estimée la plus grande est
+    redécoupée selon la longueur suivante, jusqu'à obtenir au moins nombre tranches dont
+    aucune ne dépasse 1/nombre du total estimé (au plus nombre_max tranches, 8 * nombre
+    par défaut). Taille estimée d'une tranche : volume du simplexe sum(c * l) <= capacité
+    restante sur les longueurs non fixées.
+    Retourne [(prefixe, taille estimée)], les plus grandes tranches en tête.
+    """
+    bornes, ordre = bornes_et_ordre(longueurs, L, quantites)
+    n = len(longueurs)
+    if nombre_max is None:
+        nombre_max = 8 * nombre
+    # log du volume selon la profondeur : m log(reste) - log(m!) - sum(log l) sur les m longueurs restantes
+    log_longueurs = [sum(math.log(longueurs[i]) for i in ordre[k:]) for k in range(n + 1)]
+
+    def estimation(prefixe, reste):
+        m = n - len(prefixe)
+        return math.exp(m * math.log(max(reste, 1)) - math.lgamma(m + 1) - log_longueurs[len(prefixe)])
+
+    tas = [(-estimation((), L), (), L)]
+    finales = []  # tranches qu'on ne peut plus découper (une seule longueur libre)
+    total = -tas[0][0]
+    while tas and len(tas) + len(finales) < nombre_max:
+        taille, prefixe, reste = tas[0]
+        if len(tas) + len(finales) >= nombre and -taille <= total / nombre:
+            break
+        heapq.heappop(tas)
+        i = ordre[len(prefixe)]
+        for c in range(min(bornes[i], reste // longueurs[i]) + 1):
+            enfant = (prefixe + (c,), reste - c * longueurs[i])
+            tranche = (-estimation(*enfant), *enfant)
+            if len(enfant[0]) >= n - 1:
+                finales.append(tranche)
+            else:
+                heapq.heappush(tas, tranche)
+    return [(prefixe, -taille) for taille, prefixe, _ in sorted(tas + finales)]
+
+def enumerer_tranche(longueurs, L, quantites, maximaux, prefixe):
+    """
+    Point d'entrée d'un processus d'énumération : patterns d'une tranche sous forme de
+    tableaux (comptes int32, chutes int64), avec la durée de l'énumération
+    """
+    debut = time.perf_counter()
+    patterns = list(enumerer_patterns(longueurs, L, quantites, maximaux, prefixe))
+    comptes = np.array([p[0] for p in patterns], dtype=np.int32).reshape(len(patterns), len(longueurs))
+    chutes = np.array([p[1] for p in patterns], dtype=np.int64)
+    return prefixe, comptes, chutes, time.perf_counter() - debut
+
+def enumerer_magasin(magasin, longueurs, L, quantites=None, maximaux=False, processus=1, infos=None):
+    """
+    Remplit un magasin (backend_magasin) avec les patterns réalisables.
+    processus > 1 : si la taille estimée atteint SEUIL_PARALLELE patterns, l'énumération est
+    découpée en tranches (tranches_enumeration, au moins 8 par processus) réparties sur un
+    pool de processus, les plus grandes d'abord ; chaque tranche est versée dans le magasin
+    dès qu'elle est terminée. Les tranches étant disjointes, aucun pattern n'est
+    produit deux fois et la fusion se réduit à un ajout.
+    infos : dictionnaire optionnel rempli avec la durée, le nombre de patterns de chaque
+    tranche et le temps total, pour juger de l'équilibrage.
+    Retourne le magasin.
+    """
+    debut = time.perf_counter()
+    if processus > 1 and len(longueurs) > 1:
+        bornes = [L // l for l in longueurs] if quantites is None else quantites
+        estimation = estimer_taille(longueurs, bornes, L)
+        if estimation['patterns_maximaux' if maximaux else 'patterns'] < SEUIL_PARALLELE:
+            processus = 1
+    if processus <= 1 or len(longueurs) < 2:
+        magasin.remplir(enumerer_patterns(longueurs, L, quantites, maximaux))
+        if infos is not None:
+            infos.update({'processus': 1, 'tranches': [], 'temps_enumeration': time.perf_counter() - debut})
+        return magasin
+
+    tranches = tranches_enumeration(longueurs, L, quantites, 8 * processus)
+
+    bilan = []
+    contexte = multiprocessing.get_context("spawn")
+    with contexte.Pool(processus) as pool:
+        arguments = [(longueurs, L, quantites, maximaux, prefixe) for prefixe, _ in tranches]
+        for prefixe, comptes, chutes, duree in pool.imap_unordered(_enumerer_tranche, arguments):
+            magasin.ajouter_bloc(comptes, chutes)
+            bilan.append({'prefixe': prefixe, 'patterns': len(chutes), 'duree': duree})
+
+    duree = time.perf_counter() - debut
+    durees = [tranche['duree'] for tranche in bilan]
+    logger.info("enumeration : %s patterns en %.2f s, %s tranches sur %s processus (tranche la plus longue %.2f s, "
+                "moyenne %.3f s)", len(magasin), duree, len(bilan), processus, max(durees), sum(durees) / len(durees))
+    if infos is not None:
+        infos.update({'processus': processus, 'tranches': bilan,
+                      'temps_enumeration': duree})
+    return magasin
+
+def _enumerer_tranche(arguments):
+    return enumerer_tranche(*arguments)
@@ -0,0 +1,117 @@
+# backend_estimation.py
+
+import time
+import numpy as np
+from backend_demande import DEMANDE_DEFAUT
+
+SEUIL_ENUMERATION = 5_000  # patterns : au-delà, le MIP sur tous les patterns devient lent
+SEUIL_ARCS = 10_000  # arcs du graphe arc-flow résolu par CBC
+SEUIL_PIECES = 1_000  # pièces commandées : au-delà, arrondi de la relaxation LP
+SEUIL_CELLULES_DCG = 20_000_000  # longueurs x capacité : au-delà, chaque sac à dos du pricing coûte ~0,2 s
+SEUIL_CELLULES = 200_000_000  # au-delà, même la relaxation LP est hors de portée
+SEUIL_PARALLELE = 200_000  # patterns : en deçà, lancer un pool de processus coûte plus qu'il ne rapporte
+LIMITE_PATTERNS = {'memoire': 20_000_000, 'disque': 500_000_000}  # énumération refusée au-delà
+
+def somme_fenetre(f, l, b):
+    """g[c] = f[c] + f[c - l] + ... + f[c - b*l] (termes d'indice négatif nuls), par sommes cumulées"""
+    n = len(f)
+    lignes = -(-n // l)
+    F = np.zeros(lignes * l)
+    F[:n] = f
+    C = np.cumsum(F.reshape(lignes, l), axis=0)
+    if b + 1 < lignes:
+        C[b + 1:] -= C[:-(b + 1)].copy()
+    return C.ravel()[:n]
+
+def estimer_taille(longueurs, quantites, L):
+    """
+    Taille des modèles d'une commande, sans rien énumérer : programmation dynamique de
+    comptage f[c] = nombre de patterns de longueur totale c (chaque longueur bornée par
+    min(q, L // l)), en O(n * L) opérations vectorisées.
+    Les longueurs sont traitées par ordre décroissant comme dans construire_graphe_arcflow :
+    les positions atteintes (f > 0) sont ses noeuds et ses arcs se comptent au passage.
+    Les patterns maximaux se comptent dans la même passe, selon leur plus petite longueur
+    non saturée s (les plus petites au maximum) : longueur totale dans ]L - s, L].
+    Retourne {'patterns', 'patterns_maximaux', 'noeuds', 'arcs', 'pieces', 'cellules_dp',
+    'octets_magasin', 'non_zeros_max', 'temps'} ; les nombres de patterns sont des
+    flottants (ils peuvent dépasser 10^18).
+    """
+    debut = time.perf_counter()
+    elements = sorted(((l, min(q, L // l)) for l, q in zip(longueurs, quantites)), reverse=True)
+    # Longueur occupée par les longueurs k et suivantes (plus petites) toutes au maximum
+    satures = np.cumsum([b * l for l, b in reversed(elements)])[::-1].tolist() + [0]
+    f = np.zeros(L + 1)
+    f[0] = 1.0
+    arcs = 0
+    maximaux = 1.0 if 0 < satures[0] <= L else 0.0  # toutes les longueurs au maximum
+    for k, (l, b) in enumerate(elements):
+        if b == 0:
+            continue
+        # Un arc de longueur l part de chaque position atteinte avec au plus b - 1 pièces de l
+        departs = somme_fenetre(f, l, b - 1)
+        arcs += int(np.count_nonzero(departs[:L - l + 1]))
+        fixe = satures[k + 1]
+        if fixe <= L:
+            maximaux += float(departs[max(L - l - fixe + 1, 0):L - fixe + 1].sum())
+        f = somme_fenetre(f, l, b)
+
+    n = len(longueurs)
+    patterns = float(f[1:].sum())
+    positions = np.count_nonzero(f)
+    noeuds = positions + (f[L] == 0)
+    pieces_par_barre = L // min(longueurs)
+    return {
+        'patterns': patterns,
+        'patterns_maximaux': maximaux,
+        'noeuds': int(noeuds),
+        'arcs': arcs + int(positions - 1 - (f[L] > 0)),  # plus les arcs de chute vers L
+        'pieces': int(sum(quantites)),
+        'cellules_dp': n * L,
+        'octets_magasin': patterns * (4 * n + 16),
+        'non_zeros_max': patterns * min(n, pieces_par_barre),
+        'temps': time.perf_counter() - debut,
+    }
+
+def patterns_du_modele(estimation, demande=DEMANDE_DEFAUT):
+    """Patterns énumérés par les moteurs : seuls les maximaux en demande "au_moins" """
+    return estimation['patterns_maximaux'] if demande == "au_moins" else estimation['patterns']
+
+def choisir_moteur(estimation, demande=DEMANDE_DEFAUT):
+    """
+    Moteur adapté à la taille estimée (estimer_taille) :
+    - sac à dos du pricing hors de portée (cellules_dp) : heuristique ;
+    - beaucoup de pièces ou sac à dos coûteux : relaxation LP par génération de colonnes
+      puis arrondi (un MIP peine alors à refermer l'écart en temps limité, l'arrondi est à
+      une ou deux barres de la borne) ;
+    - peu de patterns : MIP sur tous les patterns (HiGHS) ;
+    - petit graphe arc-flow : arc-flow ;
+    - sinon : génération de colonnes.
+    Retourne (clé de MOTEURS, raison).
+    """
+    patterns = patterns_du_modele(estimation, demande)
+    if estimation['cellules_dp'] > SEUIL_CELLULES:
+        return "heuristique", (f"sac à dos de {estimation['cellules_dp']:.2g} cellules : "
+                               "génération de colonnes trop coûteuse")
+    if estimation['pieces'] > SEUIL_PIECES:
+        return "grandes_quantites", f"{estimation['pieces']} pièces : arrondi de la relaxation LP"
+    if estimation['cellules_dp'] > SEUIL_CELLULES_DCG:
+        return "grandes_quantites", (f"sac à dos de {estimation['cellules_dp']:.2g} cellules : "
+                                     "arrondi de la relaxation LP")
+    if patterns <= SEUIL_ENUMERATION:
+        return "highs", f"{patterns:.0f} patterns : énumération complète"
+    if estimation['arcs'] <= SEUIL_ARCS:
+        return "arcflow", f"{patterns:.2g} patterns mais {estimation['arcs']} arcs : arc-flow"
+    return "dcg", f"{patterns:.2g} patterns, {estimation['arcs']} arcs : génération de colonnes"
+
+def verifier_enumeration(longueurs, quantites, L, maximaux=False, stockage="memoire"):
+    """
+    Refuse (ValueError) une énumération dont la taille estimée dépasse LIMITE_PATTERNS,
+    avant qu'elle ne commence. Retourne le nombre de patterns estimé.
+    """
+    estimation = estimer_taille(longueurs, [L // l for l in longueurs] if quantites is None else quantites, L)
+    patterns = estimation['patterns_maximaux' if maximaux else 'patterns']
+    if patterns > LIMITE_PATTERNS[stockage]:
+        raise ValueError(f"Énumération trop volumineuse : environ {patterns:.2g} patterns "
+                         f"({patterns * (4 * len(longueurs) + 16) / 2 ** 30:.2g} Go). Choisissez un moteur sans énumération "
+                         "(génération de colonnes, arc-flow, heuristique) ou le choix automatique.")
+    return patterns
@@ -0,0 +1,125 @@
+# backend_heuristique.py
+
+import numpy as np
+from backend_plan import plan_depuis_barres, plan_depuis_solution
+from backend_bornes import borne_combinatoire
+from backend_presolve import verifier_commande
+from backend_demande import preparer_demande, DEMANDE_DEFAUT
+
+STRATEGIES = ("ffd", "bfd", "wfd")
+
+def placer_pieces(pieces, L, strategie="ffd"):
+    """
+    Place les pièces (déjà triées) dans des barres de longueur L.
+    La recherche de la barre ouverte se fait en NumPy sur le tableau des capacités restantes :
+    - "ffd" : première barre où la pièce rentre (First-Fit)
+    - "bfd" : barre la plus remplie où la pièce rentre (Best-Fit)
+    - "wfd" : barre la moins remplie où la pièce rentre (Worst-Fit)
+    Retourne la liste des barres (listes de longueurs) et le tableau des restes.
+    """
+    if strategie not in STRATEGIES:
+        raise ValueError(f"Stratégie heuristique inconnue : {strategie}")
+
+    restes = np.empty(len(pieces), dtype=np.int64)
+    barres = []
+    nb_ouvertes = 0
+
+    for l in pieces:
+        ouvertes = restes[:nb_ouvertes]
+        possibles = ouvertes >= l
+        trouve = False
+        if nb_ouvertes:
+            if strategie == "ffd":
+                k = int(np.argmax(possibles))
+            elif strategie == "bfd":
+                k = int(np.argmin(np.where(possibles, ouvertes, L + 1)))
+            else:
+                k = int(np.argmax(ouvertes))
+            trouve = bool(possibles[k])
+
+        if not trouve:
+            # Ouvrir une nouvelle barre
+            k = nb_ouvertes
+            restes[k] = L
+            barres.append([])
+            nb_ouvertes += 1
+
+        restes[k] -= l
+        barres[k].append(int(l))
+
+    return barres, restes[:nb_ouvertes]
+
+def solution_heuristique(longueurs, quantites, L, strategie="ffd"):
+    """
+    Solution heuristique exprimée en variables de pattern : {tuple de comptes: multiplicité}.
+    Sert de point de départ (MIP start) aux modèles entiers.
+    """
+    pieces = np.repeat(np.asarray(longueurs, dtype=np.int64), np.asarray(quantites, dtype=np.int64))
+    barres, _ = placer_pieces(np.sort(pieces)[::-1], L, strategie)
+    indices = {l: j for j, l in reversed(list(enumerate(longueurs)))}
+    solution = {}
+    for cuts in barres:
+        comptes = [0] * len(longueurs)
+        for l in cuts:
+            comptes[indices[l]] += 1
+        pattern = tuple(comptes)
+        solution[pattern] = solution.get(pattern, 0) + 1
+    return solution
+
+def plan_heuristique_optimal(longueurs, quantites, L, infos, callback=None):
+    """
+    Vérifie la commande (ValueError si une pièce dépasse la barre), puis
+    arrêt anticipé des moteurs exacts : la meilleure borne combinatoire est rangée dans
+    infos['borne_inferieure'] ; si le plan FFD l'atteint, il est optimal et renvoyé
+    (callback compris) sans construire de modèle. Retourne None sinon.
+    """
+    verifier_commande(longueurs, quantites, L)
+    borne = borne_combinatoire(longueurs, quantites, L)
+    infos['borne_inferieure'] = borne
+    solution = solution_heuristique(longueurs, quantites, L)
+    if sum(solution.values()) > borne:
+        return None
+    infos['optimal'] = True
+    resultats = plan_depuis_solution(solution, longueurs, L)
+    resultats.infos = infos
+    if callback is not None:
+        callback(resultats, borne)
+    return resultats
+
+def optimiser_decoupe_heuristique(longueurs, quantites, L=6000, strategie="ffd", temps_limite=None,
+                                  callback=None, infos=None, demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None):
+    """
+    Optimise la découpe de barres avec une heuristique gloutonne décroissante
+    (FFD, BFD ou Worst-Fit) : un plan en quelques millisecondes pour les très grosses commandes.
+    Le plan produit exactement la demande : il est réalisable dans tous les modes de demande
+    (demande, cout_surplus et surplus_max sont acceptés pour homogénéité avec les autres moteurs).
+    infos : dictionnaire optionnel rempli avec la meilleure borne inférieure combinatoire
+    (L1, L2, fonctions dual-réalisables) et l'écart prouvé du plan trouvé.
+    temps_limite est accepté pour homogénéité avec les autres moteurs (la résolution est immédiate) ;
+    callback(plan, borne) reçoit le plan.
+    """
+    if infos is None:
+        infos = {}
+
+    verifier_commande(longueurs, quantites, L)
+    preparer_demande(quantites, demande, cout_surplus, surplus_max)  # validation du mode
+
+    # Pièces triées par longueur décroissante
+    pieces = np.repeat(np.asarray(longueurs, dtype=np.int64), np.asarray(quantites, dtype=np.int64))
+    pieces = np.sort(pieces)[::-1]
+
+    barres, restes = placer_pieces(pieces, L, strategie)
+
+    borne = borne_combinatoire(longueurs, quantites, L)
+    infos['borne_inferieure'] = borne
+    infos['ecart'] = len(barres) - borne
+    infos['ecart_relatif'] = (len(barres) - borne) / borne if borne else 0
+
+    resultats = plan_depuis_barres(
+        {'cuts': cuts, 'waste': int(reste)} for cuts, reste in zip(barres, restes)
+    )
+    resultats.infos = infos
+    infos['optimal'] = len(resultats) <= borne
+    if callback is not None:
+        callback(resultats, borne)
+    return resultats
@@ -0,0 +1,162 @@
+# backend_highs.py
+
+import math
+import numpy as np
+from scipy.optimize import milp, linprog, LinearConstraint, Bounds
+from scipy.sparse import vstack
+from backend_decoupe import generer_patterns
+from backend_demande import preparer_demande, couts_colonnes, bornes_lignes, DEMANDE_DEFAUT
+import time
+from backend_plan import PlanDecoupe
+from backend_heuristique import solution_heuristique, plan_heuristique_optimal
+from backend_magasin import rss_max, rss_actuelle
+import logging
+
+logger = logging.getLogger(__name__)
+
+def resoudre_relaxation(matrice, quantites, couts, maximums=None):
+    """
+    Relaxation linéaire min couts.x sous quantites <= matrice.x <= maximums, x >= 0 (HiGHS,
+    en mémoire). maximums None : égalité ; valeurs infinies : pas de plafond.
+    Retourne (objectif, x, duals) avec x et duals en tableaux NumPy, ou None si irréalisable.
+    """
+    quantites = np.asarray(quantites, dtype=float)
+    if maximums is None:
+        res = linprog(couts, A_eq=matrice, b_eq=quantites, bounds=(0, None), method="highs")
+        if res.status != 0:
+            return None
+        return res.fun, res.x, res.eqlin.marginals
+
+    # Forme A_ub.x <= b_ub : -A.x <= -quantites et A.x <= maximums (lignes finies)
+    finies = np.flatnonzero(np.isfinite(maximums))
+    res = linprog(couts, A_ub=vstack([-matrice, matrice[finies]]),
+                  b_ub=np.concatenate([-quantites, np.asarray(maximums)[finies]]),
+                  bounds=(0, None), method="highs")
+    if res.status != 0:
+        return None
+    duals = -res.ineqlin.marginals[:len(quantites)]
+    duals[finies] += res.ineqlin.marginals[len(quantites):]
+    return res.fun, res.x, duals
+
+def colonnes_par_pricing(magasin, demande, colonnes, k_colonnes=50, max_iterations=1000):
+    """
+    Colonnes du magasin suffisantes pour la relaxation linéaire complète : un maître
+    restreint aux colonnes données est résolu par HiGHS, puis le pricing parcourt le magasin
+    tranche par tranche et les k_colonnes de coût réduit le plus négatif entrent dans le
+    maître, jusqu'à ce qu'aucune ne soit améliorante.
+    Retourne (indices des colonnes, relaxation du dernier maître ou None, nombre de tours).
+    """
+    minimums, maximums = bornes_lignes(demande)
+    plafonds = None if demande['mode'] == "exacte" else maximums
+    def cout(comptes, chutes):
+        return couts_colonnes(comptes.T, chutes, demande)
+
+    colonnes = list(colonnes)
+    relaxation = None
+    for iteration in range(max_iterations):
+        matrice = magasin.matrice(colonnes)
+        relaxation = resoudre_relaxation(matrice, minimums,
+                                         couts_colonnes(matrice, magasin.chutes[colonnes], demande), plafonds)
+        if relaxation is None:
+            break
+        presentes = set(colonnes)
+        nouvelles, _ = magasin.meilleurs_couts_reduits(relaxation[2], cout, k_colonnes)
+        nouvelles = [int(i) for i in nouvelles if i not in presentes]
+        if not nouvelles:
+            break
+        colonnes.extend(nouvelles)
+    return colonnes, relaxation, iteration + 1
+
+def optimiser_decoupe_highs(longueurs, quantites, L=6000, temps_limite=None, callback=None, infos=None,
+                            demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None, stockage="memoire",
+                            dossier_patterns=None, dossier_bibliotheque=None, processus=1):
+    """
+    Optimise la découpe de barres sur l'ensemble des patterns énumérés, résolu en mémoire
+    par HiGHS (scipy.optimize.milp) : ni fichier temporaire ni sous-processus CBC.
+    Même modèle que optimiser_decoupe, avec les mêmes modes de demande.
+    stockage="disque" : pour les énumérations de plusieurs millions de patterns, ceux-ci
+    sont écrits par blocs dans un magasin projeté en mémoire (dossier_patterns, temporaire
+    par défaut) ; seules les colonnes retenues par colonnes_par_pricing entrent dans le
+    problème entier, l'optimalité n'est alors prouvée que par la borne LP.
+    infos : dictionnaire optionnel rempli avec le statut, la solution x et les duals
+    de la relaxation (tableaux NumPy), le nombre de patterns, la mémoire résidente prise
+    par l'énumération et la résolution (rss_resolution, Mo), le pic de mémoire résidente
+    du processus depuis son lancement (rss_max, Mo) ainsi que les temps de construction et
+    de résolution.
+    dossier_bibliotheque, processus : persistance et parallélisme de l'énumération (generer_patterns),
+    dont le bilan est rangé dans infos['enumeration'].
+    Si le plan FFD atteint la borne inférieure combinatoire, il est renvoyé sans résolution.
+    """
+    if infos is None:
+        infos = {}
+    demande = preparer_demande(quantites, demande, cout_surplus, surplus_max)
+    resultats = plan_heuristique_optimal(longueurs, quantites, L, infos, callback)
+    if resultats is not None:
+        return resultats
+    debut = time.perf_counter()
+    rss_debut = rss_actuelle()
+    magasin = generer_patterns(longueurs, L, quantites, maximaux=demande['mode'] == "au_moins",
+                               stockage=stockage, dossier=dossier_patterns,
+                               dossier_bibliotheque=dossier_bibliotheque, processus=processus, infos=infos)
+    infos['nb_patterns'] = len(magasin)
+    infos['temps_enumeration'] = time.perf_counter() - debut
+    minimums, maximums = bornes_lignes(demande)
+
+    debut = time.perf_counter()
+    if stockage == "disque":
+        # Colonnes FFD ajoutées sans recherche : un doublon ne change ni le LP ni le MIP
+        depart = [magasin.ajouter(pattern) for pattern in solution_heuristique(longueurs, quantites, L)]
+        colonnes, relaxation, infos['iterations_pricing'] = colonnes_par_pricing(magasin, demande, depart)
+        matrice = magasin.matrice(colonnes)
+        couts = couts_colonnes(matrice, magasin.chutes[colonnes], demande)
+    else:
+        colonnes = slice(None)
+        matrice = magasin.matrice()
+        couts = couts_colonnes(matrice, magasin.chutes, demande)
+        relaxation = resoudre_relaxation(matrice, minimums, couts,
+                                         None if demande['mode'] == "exacte" else maximums)
+    infos['temps_construction'] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    borne = infos['borne_inferieure']
+    if relaxation is not None:
+        infos['borne_lp'], _, infos['duals'] = relaxation
+        if demande['mode'] != "surplus":
+            # Objectif en barres, ou en chute en demande exacte : barres = (pièces + chute) / L
+            barres = infos['borne_lp'] if demande['mode'] == "au_moins" else (
+                (infos['borne_lp'] + float(np.dot(longueurs, quantites))) / L)
+            borne = max(borne, math.ceil(barres - 1e-6))
+
+    options = {} if temps_limite is None else {'time_limit': temps_limite}
+    res = milp(couts, constraints=LinearConstraint(matrice, minimums, maximums),
+               integrality=np.ones(matrice.shape[1]), bounds=Bounds(0, np.inf), options=options)
+    infos['temps_resolution'] = time.perf_counter() - debut
+    infos['statut'] = res.message
+    infos['optimal'] = res.status == 0
+    rss_fin = rss_actuelle()
+    infos['rss_resolution'] = None if rss_debut is None or rss_fin is None else rss_fin - rss_debut
+    infos['rss_max'] = rss_max()
+    logger.info("highs : %s patterns (%s), statut %s, mémoire résidente %s Mo pendant la résolution "
+                "(pic du processus %s Mo)", len(magasin), stockage, res.message, infos['rss_resolution'],
+                infos['rss_max'])
+
+    if res.x is None:
+        resultats = PlanDecoupe()
+        resultats.infos = infos
+        return resultats
+    x = np.rint(res.x).astype(np.int64)
+    usages = magasin.usages
+    usages[colonnes] = x
+    infos['x'] = x if stockage == "disque" else usages
+    infos['objectif_final'] = float(couts @ x)
+    resultats = magasin.plan()
+    resultats.infos = infos
+    if stockage == "disque":
+        # Colonnes restreintes : optimalité prouvée seulement si la borne est atteinte
+        infos['optimal'] = infos['optimal'] and demande['mode'] != "surplus" and len(resultats) <= borne
+
+    # Sauf coût de surplus, l'optimum du modèle minimise le nombre de barres
+    if callback is not None and resultats:
+        optimal_barres = infos['optimal'] and demande['mode'] != "surplus"
+        callback(resultats, len(resultats) if optimal_barres else borne)
+    return resultats
@@ -0,0 +1,189 @@
+# backend_lp.py
+
+import numpy as np
+
+def cout_colonne(comptes, couts_surplus):
+    """Coût d'un pattern dans le maître : une barre, plus le coût de surplus de ses pièces"""
+    if couts_surplus is None:
+        return 1.0
+    return 1.0 + float(np.dot(comptes, couts_surplus))
+
+class MaitreHighs:
+    """
+    Problème maître min sum(x) sous A.x >= quantites résolu en mémoire par HiGHS (highspy).
+    Les colonnes sont ajoutées au modèle persistant (addCol) et le simplexe repart de la
+    base précédente. Logiciel libre, sans limite de taille du modèle.
+    maximums : plafonds de production par ligne (None : aucun) ; couts_surplus : coût
+    ajouté à une colonne par pièce qu'elle produit (voir backend_demande). Les duals
+    renvoyés sont alors ceux des lignes à deux bornes.
+    """
+
+    def __init__(self, quantites, colonnes, maximums=None, couts_surplus=None):
+        import highspy
+        self.highspy = highspy
+        self.h = highspy.Highs()
+        self.h.setOptionValue("output_flag", False)
+        self.couts_surplus = couts_surplus
+        n = len(quantites)
+        superieures = np.full(n, highspy.kHighsInf)
+        if maximums is not None:
+            superieures = np.array([highspy.kHighsInf if m is None else m for m in maximums], dtype=float)
+        self.h.addRows(n, np.asarray(quantites, dtype=float), superieures,
+                       0, np.array([], dtype=np.int32), np.array([], dtype=np.int32), np.array([]))
+        self.nb_colonnes = 0
+        for comptes in colonnes:
+            self.ajouter_colonne(comptes)
+
+    def ajouter_colonne(self, comptes, cout=None):
+        """Ajoute une colonne, de coût cout_colonne sauf coût imposé (variable artificielle)"""
+        comptes = np.asarray(comptes)
+        lignes = np.flatnonzero(comptes).astype(np.int32)
+        cout = cout_colonne(comptes, self.couts_surplus) if cout is None else cout
+        self.h.addCol(cout, 0, self.highspy.kHighsInf, len(lignes), lignes, comptes[lignes].astype(float))
+        self.nb_colonnes += 1
+
+    def changer_bornes(self, indices, inferieures, superieures):
+        """Bornes des colonnes d'indices donnés ; une borne supérieure None est infinie"""
+        superieures = [self.highspy.kHighsInf if s is None else s for s in superieures]
+        self.h.changeColsBounds(len(indices), np.asarray(indices, dtype=np.int32),
+                                np.asarray(inferieures, dtype=float), np.asarray(superieures, dtype=float))
+
+    def retirer_colonnes(self, indices):
+        """Supprime les colonnes d'indices donnés ; les suivantes sont renumérotées dans l'ordre"""
+        self.h.deleteCols(len(indices), np.asarray(indices, dtype=np.int32))
+        self.nb_colonnes -= len(indices)
+
+    def resoudre(self):
+        """Relaxation linéaire : (objectif, x, duals) en tableaux NumPy, ou None"""
+        self.h.run()
+        if self.h.getModelStatus() != self.highspy.HighsModelStatus.kOptimal:
+            return None
+        solution = self.h.getSolution()
+        return (self.h.getInfo().objective_function_value,
+                np.array(solution.col_value), np.array(solution.row_dual))
+
+    def resoudre_entier(self, depart=None, temps_limite=None):
+        """
+        Problème entier sur les colonnes présentes, à partir de depart {indice: valeur}.
+        Retourne le vecteur x entier (NumPy) ou None.
+        """
+        indices = np.arange(self.nb_colonnes, dtype=np.int32)
+        self.h.changeColsIntegrality(self.nb_colonnes, indices,
+                                     np.array([self.highspy.HighsVarType.kInteger] * self.nb_colonnes))
+        if temps_limite is not None:
+            self.h.setOptionValue("time_limit", float(temps_limite))
+        if depart:
+            self.h.setSolution(len(depart), np.array(list(depart), dtype=np.int32),
+                               np.array(list(depart.values()), dtype=float))
+        self.h.run()
+        solution = self.h.getSolution()
+        if not solution.value_valid:
+            return None
+        return np.rint(solution.col_value).astype(np.int64)
+
+class MaitreCplex:
+    """
+    Problème maître min sum(x) sous A.x >= quantites résolu par CPLEX (docplex).
+    L'édition Community refuse les modèles de plus de 1000 variables ou contraintes.
+    maximums et couts_surplus : comme pour MaitreHighs ; les duals renvoyés sont la somme
+    des duals des contraintes de demande et de plafond de chaque longueur.
+    """
+
+    def __init__(self, quantites, colonnes, maximums=None, couts_surplus=None):
+        from docplex.mp.model import Model
+        self.Model = Model
+        self.quantites = quantites
+        self.maximums = maximums if maximums is not None else [None] * len(quantites)
+        self.couts_surplus = couts_surplus
+        self.colonnes = [list(c) for c in colonnes]
+        self.couts = [cout_colonne(c, couts_surplus) for c in self.colonnes]
+        self.mdl = Model("master_problem")
+        self.x = [self.mdl.continuous_var(name=f"x_{i}") for i in range(len(self.colonnes))]
+        # Contraintes créées avec les colonnes initiales (jamais trivialement irréalisables)
+        self.demandes = [
+            self.mdl.add_constraint(
+                self.mdl.sum(self.x[i] * c[j] for i, c in enumerate(self.colonnes) if c[j]) >= q,
+                ctname=f"demand_{j}"
+            )
+            for j, q in enumerate(quantites)
+        ]
+        self.plafonds = {
+            j: self.mdl.add_constraint(
+                self.mdl.sum(self.x[i] * c[j] for i, c in enumerate(self.colonnes) if c[j]) <= m,
+                ctname=f"cap_{j}"
+            )
+            for j, m in enumerate(self.maximums) if m is not None
+        }
+        self.mdl.minimize(self.mdl.sum(x * cout for x, cout in zip(self.x, self.couts)))
+
+    @property
+    def nb_colonnes(self):
+        return len(self.colonnes)
+
+    def ajouter_colonne(self, comptes, cout=None):
+        """Ajoute une colonne, de coût cout_colonne sauf coût imposé (variable artificielle)"""
+        cout = cout_colonne(comptes, self.couts_surplus) if cout is None else cout
+        var = self.mdl.continuous_var(name=f"x_{self.mdl.number_of_variables}")
+        self.x.append(var)
+        self.colonnes.append(list(comptes))
+        self.couts.append(cout)
+        for j, n in enumerate(comptes):
+            if n:
+                self.demandes[j].left_expr.add_term(var, n)
+                if j in self.plafonds:
+                    self.plafonds[j].left_expr.add_term(var, n)
+        self.mdl.objective_expr.add_term(var, cout)
+
+    def changer_bornes(self, indices, inferieures, superieures):
+        """Bornes des colonnes d'indices donnés ; une borne supérieure None est infinie"""
+        for i, inf, sup in zip(indices, inferieures, superieures):
+            self.x[i].lb = inf
+            self.x[i].ub = self.mdl.infinity if sup is None else sup
+
+    def retirer_colonnes(self, indices):
+        """
+        Retire les colonnes d'indices donnés ; les suivantes sont renumérotées dans l'ordre.
+        La variable CPLEX reste dans le modèle, bornée à 0.
+        """
+        for i in sorted(indices, reverse=True):
+            self.x.pop(i).ub = 0
+            self.colonnes.pop(i)
+            self.couts.pop(i)
+
+    def resoudre(self):
+        """Relaxation linéaire : (objectif, x, duals) en tableaux NumPy, ou None"""
+        solution = self.mdl.solve()
+        if not solution:
+            return None
+        duals = np.array(self.mdl.dual_values(self.demandes))
+        for j, contrainte in self.plafonds.items():
+            duals[j] += contrainte.dual_value
+        return solution.objective_value, np.array(solution.get_values(self.x)), duals
+
+    def resoudre_entier(self, depart=None, temps_limite=None):
+        """
+        Problème entier sur les colonnes présentes, à partir de depart {indice: valeur}.
+        Retourne le vecteur x entier (NumPy) ou None.
+        """
+        from docplex.mp.solution import SolveSolution
+        mdl = self.Model("final_problem")
+        x = [mdl.integer_var(name=f"x_{i}") for i in range(len(self.colonnes))]
+        for j, (q, m) in enumerate(zip(self.quantites, self.maximums)):
+            production = mdl.sum(x[i] * c[j] for i, c in enumerate(self.colonnes) if c[j])
+            mdl.add_constraint(production >= q)
+            if m is not None:
+                mdl.add_constraint(production <= m)
+        mdl.minimize(mdl.sum(v * cout for v, cout in zip(x, self.couts)))
+        if temps_limite is not None:
+            mdl.set_time_limit(temps_limite)
+        if depart:
+            mdl.add_mip_start(SolveSolution(mdl, {x[i]: n for i, n in depart.items()}))
+        solution = mdl.solve()
+        if not solution:
+            return None
+        return np.rint(solution.get_values(x)).astype(np.int64)
+
+SOLVEURS_LP = {
+    "highs": MaitreHighs,
+    "cplex": MaitreCplex,
+}
@@ -0,0 +1,299 @@
+# backend_magasin.py
+
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from itertools import islice
+import numpy as np
+from scipy.sparse import csr_matrix
+from backend_plan import PlanDecoupe
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TAILLE_BLOC = 100_000  # patterns lus ou écrits à la fois
+
+def rss_max():
+    """
+    Pic de mémoire résidente du processus depuis son lancement en Mo, ou None si la plateforme
+    ne le fournit pas ; il ne redescend jamais et ne mesure donc pas un calcul en particulier
+    """
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1024 ** 2 if sys.platform == "darwin" else pic / 1024
+
+def rss_actuelle():
+    """
+    Mémoire résidente actuelle du processus en Mo (/proc/self/statm), ou None hors Linux.
+    La différence entre deux lectures mesure un calcul, à l'activité des autres threads près.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+class MagasinPatterns:
+    """
+    Patterns de découpe rangés dans des tableaux NumPy : matrice des comptes (patterns x
+    types de pièces, int32), vecteur des chutes et vecteur des utilisations (multiplicité
+    de chaque pattern dans la solution). Une ligne coûte 4 octets par type de pièce plus
+    16 octets, au lieu d'un tuple d'entiers Python et d'un dictionnaire par pattern.
+    Les tableaux grandissent par doublement : ajouter un pattern ne recopie pas le magasin.
+    attributs : tableaux optionnels d'une valeur par pattern (dispositions 2D par exemple).
+    """
+
+    def __init__(self, longueurs, L, comptes=None, chutes=None, attributs=None):
+        self.longueurs = np.asarray(longueurs)
+        self.L = L
+        n = len(self.longueurs)
+        if comptes is None:
+            comptes = np.zeros((0, n), dtype=np.int32)
+        comptes = np.asarray(comptes, dtype=np.int32).reshape(-1, n)
+        if chutes is None:
+            chutes = L - comptes @ self.longueurs
+        self._comptes = comptes
+        self._chutes = np.asarray(chutes)
+        self._usages = np.zeros(len(comptes), dtype=np.int64)
+        self.taille = len(comptes)
+        self.attributs = attributs or {}
+        self._index = None  # octets d'une ligne de comptes -> indice, construit à la demande
+
+    @property
+    def comptes(self):
+        return self._comptes[:self.taille]
+
+    @property
+    def chutes(self):
+        return self._chutes[:self.taille]
+
+    @property
+    def usages(self):
+        return self._usages[:self.taille]
+
+    def __len__(self):
+        return self.taille
+
+    def octets(self):
+        """Mémoire occupée par les tableaux du magasin"""
+        return self.comptes.nbytes + self.chutes.nbytes + self.usages.nbytes
+
+    def indice(self, comptes):
+        """Indice du pattern de comptes donnés, ou None s'il n'est pas dans le magasin"""
+        if self._index is None:
+            self._index = {ligne.tobytes(): i for i, ligne in enumerate(self.comptes)}
+        return self._index.get(np.asarray(comptes, dtype=np.int32).tobytes())
+
+    def ajouter(self, comptes, chute=None):
+        """Ajoute un pattern (sans contrôle de doublon) et retourne son indice"""
+        self.ajouter_bloc([comptes], None if chute is None else [chute])
+        return self.taille - 1
+
+    def ajouter_bloc(self, comptes, chutes=None):
+        """Ajoute un bloc de patterns (sans contrôle de doublon)"""
+        comptes = np.asarray(comptes, dtype=np.int32).reshape(-1, len(self.longueurs))
+        if chutes is None:
+            chutes = self.L - comptes @ self.longueurs
+        debut, fin = self.taille, self.taille + len(comptes)
+        if fin > len(self._comptes):
+            capacite = max(2 * len(self._comptes), fin, 16)
+            self._comptes = np.resize(self._comptes, (capacite, len(self.longueurs)))
+            self._chutes = np.resize(self._chutes, capacite)
+            self._usages = np.resize(self._usages, capacite)
+        self._comptes[debut:fin] = comptes
+        self._chutes[debut:fin] = chutes
+        self._usages[debut:fin] = 0
+        self.taille = fin
+        if self._index is not None:
+            for i, ligne in enumerate(comptes, debut):
+                self._index.setdefault(ligne.tobytes(), i)
+
+    def remplir(self, patterns, taille_bloc=TAILLE_BLOC):
+        """
+        Consomme un itérable de patterns (comptes, chute), par exemple enumerer_patterns,
+        bloc par bloc : seul un bloc de tuples Python existe à la fois. Retourne le magasin.
+        """
+        patterns = iter(patterns)
+        while True:
+            bloc = list(islice(patterns, taille_bloc))
+            if not bloc:
+                return self
+            self.ajouter_bloc([p[0] for p in bloc], [p[1] for p in bloc])
+
+    def lire(self, debut, fin):
+        """Comptes et chutes des patterns debut à fin (exclu)"""
+        return self.comptes[debut:fin], self.chutes[debut:fin]
+
+    def blocs(self, taille_bloc=TAILLE_BLOC):
+        """Parcourt le magasin par tranches : (indice de début, comptes, chutes)"""
+        for debut in range(0, self.taille, taille_bloc):
+            yield (debut, *self.lire(debut, min(debut + taille_bloc, self.taille)))
+
+    def meilleurs_couts_reduits(self, valeurs, cout, k=1, taille_bloc=TAILLE_BLOC):
+        """
+        Pricing par parcours du magasin : les k patterns de coût réduit
+        cout(comptes, chutes) - comptes.valeurs le plus négatif.
+        Retourne (indices, coûts réduits), triés par coût réduit croissant.
+        """
+        indices = np.zeros(0, dtype=np.int64)
+        reduits = np.zeros(0)
+        for debut, comptes, chutes in self.blocs(taille_bloc):
+            couts = cout(comptes, chutes) - comptes @ valeurs
+            meilleurs = np.argsort(couts)[:k]
+            indices = np.concatenate([indices, meilleurs + debut])
+            reduits = np.concatenate([reduits, couts[meilleurs]])
+            garder = np.argsort(reduits)[:k]
+            indices, reduits = indices[garder], reduits[garder]
+        garder = reduits < -1e-9
+        return indices[garder], reduits[garder]
+
+    def retirer(self, indices):
+        """
+        Retire les patterns d'indices donnés (les suivants sont renumérotés dans l'ordre)
+        et retourne leurs comptes
+        """
+        gardes = np.ones(self.taille, dtype=bool)
+        gardes[np.asarray(indices, dtype=np.int64)] = False
+        retires = self.comptes[~gardes].copy()
+        self._comptes = self.comptes[gardes]
+        self._chutes = self.chutes[gardes]
+        self._usages = self.usages[gardes]
+        self.attributs = {cle: valeurs[gardes] for cle, valeurs in self.attributs.items()}
+        self.taille = len(self._comptes)
+        self._index = None
+        return retires
+
+    def matrice(self, indices=None):
+        """
+        Matrice creuse CSR (types de pièces x patterns) des comptes, construite tranche
+        par tranche : seuls les coefficients non nuls sont stockés.
+        indices : restreint la matrice à ces patterns, dans cet ordre.
+        """
+        if indices is not None:
+            comptes = self.comptes[np.asarray(indices, dtype=np.int64)]
+            tranches = [(0, comptes)]
+            n = len(comptes)
+        else:
+            tranches = ((debut, comptes) for debut, comptes, _ in self.blocs())
+            n = self.taille
+        colonnes, lignes, valeurs = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int32)]
+        for debut, comptes in tranches:
+            i, j = np.nonzero(comptes)
+            colonnes.append(i + debut)
+            lignes.append(j)
+            valeurs.append(comptes[i, j])
+        return csr_matrix((np.concatenate(valeurs), (np.concatenate(lignes), np.concatenate(colonnes))),
+                          shape=(len(self.longueurs), n))
+
+    def pattern(self, i):
+        """Pattern i au format des plans {'cuts', 'waste'}"""
+        comptes, chutes = self.lire(i, i + 1)
+        return {
+            'cuts': np.repeat(self.longueurs, comptes[0]).tolist(),
+            'waste': chutes[0].item()
+        }
+
+    def plan(self, usages=None):
+        """
+        Plan de découpe des patterns utilisés (usages, par défaut le vecteur d'utilisation
+        du magasin) ; seuls ces patterns sont convertis en dictionnaires
+        """
+        usages = self.usages if usages is None else np.asarray(usages)
+        plan = PlanDecoupe()
+        for i in np.flatnonzero(usages > 0):
+            plan.ajouter(self.pattern(i), int(usages[i]))
+        return plan
+
+class MagasinDisque(MagasinPatterns):
+    """
+    Magasin de patterns sur disque, pour les énumérations de plusieurs millions de patterns :
+    comptes, chutes et utilisations sont ajoutés par blocs à trois fichiers binaires et relus
+    par np.memmap. Chaque tranche lue est une projection distincte, libérée après usage :
+    parcourir le magasin (pricing, matrice) ne garde en mémoire qu'une tranche à la fois.
+    dossier : répertoire des fichiers (None : répertoire temporaire supprimé avec le magasin).
+    """
+
+    TYPES = {'comptes': np.int32, 'chutes': np.int64, 'usages': np.int64}
+
+    def __init__(self, longueurs, L, dossier=None, attributs=None):
+        super().__init__(longueurs, L, attributs=attributs)
+        if dossier is None:
+            dossier = tempfile.mkdtemp(prefix="patterns_")
+            self._nettoyage = weakref.finalize(self, shutil.rmtree, dossier, True)
+        else:
+            os.makedirs(dossier, exist_ok=True)
+        self.dossier = dossier
+        self.fichiers = {nom: os.path.join(dossier, f"{nom}.bin") for nom in self.TYPES}
+        for chemin in self.fichiers.values():
+            open(chemin, "wb").close()
+
+    def _projection(self, nom, debut, fin, mode="r"):
+        largeur = len(self.longueurs) if nom == 'comptes' else 1
+        forme = (fin - debut, largeur) if nom == 'comptes' else (fin - debut,)
+        if fin <= debut:
+            return np.zeros(forme, dtype=self.TYPES[nom])
+        taille_ligne = np.dtype(self.TYPES[nom]).itemsize * largeur
+        return np.memmap(self.fichiers[nom], dtype=self.TYPES[nom], mode=mode,
+                         offset=debut * taille_ligne, shape=forme)
+
+    @property
+    def comptes(self):
+        return self._projection('comptes', 0, self.taille)
+
+    @property
+    def chutes(self):
+        return self._projection('chutes', 0, self.taille)
+
+    @property
+    def usages(self):
+        return self._projection('usages', 0, self.taille, "r+")
+
+    def octets(self):
+        """Taille des fichiers du magasin"""
+        return sum(os.path.getsize(chemin) for chemin in self.fichiers.values())
+
+    def lire(self, debut, fin):
+        return self._projection('comptes', debut, fin), self._projection('chutes', debut, fin)
+
+    def ajouter_bloc(self, comptes, chutes=None):
+        comptes = np.asarray(comptes, dtype=np.int32).reshape(-1, len(self.longueurs))
+        if chutes is None:
+            chutes = self.L - comptes @ self.longueurs
+        blocs = {'comptes': comptes, 'chutes': np.asarray(chutes),
+                 'usages': np.zeros(len(comptes))}
+        for nom, valeurs in blocs.items():
+            with open(self.fichiers[nom], "ab") as fichier:
+                fichier.write(np.ascontiguousarray(valeurs, dtype=self.TYPES[nom]).tobytes())
+        self.taille += len(comptes)
+
+    def indice(self, comptes):
+        """Indice du pattern de comptes donnés (recherche tranche par tranche), ou None"""
+        comptes = np.asarray(comptes, dtype=np.int32)
+        for debut, bloc, _ in self.blocs():
+            egaux = np.flatnonzero((bloc == comptes).all(axis=1))
+            if len(egaux):
+                return debut + int(egaux[0])
+        return None
+
+    def retirer(self, indices):
+        """Retire les patterns d'indices donnés en réécrivant les fichiers tranche par tranche"""
+        gardes = np.ones(self.taille, dtype=bool)
+        gardes[np.asarray(indices, dtype=np.int64)] = False
+        retires = self.comptes[~gardes].copy()
+        for nom, chemin in self.fichiers.items():
+            with open(chemin + ".tmp", "wb") as fichier:
+                for debut in range(0, self.taille, TAILLE_BLOC):
+                    fin = min(debut + TAILLE_BLOC, self.taille)
+                    tranche = self._projection(nom, debut, fin)
+                    fichier.write(np.ascontiguousarray(tranche[gardes[debut:fin]]).tobytes())
+                    del tranche
+            os.replace(chemin + ".tmp", chemin)
+        self.attributs = {cle: valeurs[gardes] for cle, valeurs in self.attributs.items()}
+        self.taille = int(gardes.sum())
+        return retires
@@ -0,0 +1,59 @@
+# backend_normalisation.py
+
+from decimal import Decimal
+from functools import reduce
+from math import gcd
+from backend_plan import PlanDecoupe
+
+RESOLUTION = Decimal("0.01")  # plus petite longueur représentable, en mm
+
+def en_unites(valeur, resolution=RESOLUTION):
+    """
+    Convertit une longueur (entière ou décimale, en mm) en nombre entier d'unités de résolution
+    """
+    unites = Decimal(str(valeur)) / resolution
+    if unites != unites.to_integral_value():
+        raise ValueError(f"La longueur {valeur} mm n'est pas un multiple de la résolution {resolution} mm")
+    return int(unites)
+
+def depuis_decimal(valeur):
+    """Décimal exact -> int si la valeur est entière, float sinon"""
+    return int(valeur) if valeur == valeur.to_integral_value() else float(valeur)
+
+def normaliser(longueurs, L, trait_de_scie=0, resolution=RESOLUTION):
+    """
+    Ramène une commande à des entiers aussi petits que possible pour les moteurs.
+    Chaque pièce consomme sa longueur plus le trait de scie, la barre sa longueur plus un
+    trait (la dernière pièce n'a pas de trait après elle). Les longueurs décimales sont
+    converties en unités de résolution, puis tout est divisé par le PGCD commun.
+    Retourne (longueurs, L, correspondance), correspondance servant à denormaliser_plan.
+    """
+    trait = en_unites(trait_de_scie, resolution)
+    longueurs_unites = [en_unites(l, resolution) + trait for l in longueurs]
+    L_unites = en_unites(L, resolution) + trait
+    pgcd = reduce(gcd, longueurs_unites, L_unites)
+
+    longueurs_normalisees = [u // pgcd for u in longueurs_unites]
+    correspondance = {
+        'longueurs': dict(zip(longueurs_normalisees, longueurs)),
+        'L': Decimal(str(L)),
+        'trait_de_scie': Decimal(str(trait_de_scie)),
+        'pgcd': pgcd,
+        'pas': resolution * pgcd,
+    }
+    return longueurs_normalisees, L_unites // pgcd, correspondance
+
+def denormaliser_plan(plan, correspondance):
+    """
+    Plan exprimé dans les longueurs d'origine. La chute d'une barre est la longueur
+    restante une fois les pièces et les traits de scie entre pièces retirés.
+    """
+    longueurs = correspondance['longueurs']
+    resultat = PlanDecoupe()
+    for entree in plan.entrees:
+        cuts = [longueurs[c] for c in entree.pattern['cuts']]
+        traits = correspondance['trait_de_scie'] * max(len(cuts) - 1, 0)
+        chute = correspondance['L'] - sum(Decimal(str(c)) for c in cuts) - traits
+        resultat.ajouter({'cuts': cuts, 'waste': depuis_decimal(chute)}, entree.multiplicite)
+    resultat.infos = plan.infos
+    return resultat
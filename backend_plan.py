@@ -0,0 +1,145 @@
+# backend_plan.py
+
+from bisect import bisect_right
+from collections.abc import Sequence
+
+class EntreePlan:
+    """Un motif de découpe et son nombre d'utilisations"""
+    __slots__ = ('pattern', 'multiplicite', 'waste', 'surface')
+
+    def __init__(self, pattern, multiplicite):
+        self.pattern = pattern
+        self.multiplicite = multiplicite
+        self.waste = pattern.get('waste', pattern.get('waste_length', 0))
+        self.surface = pattern.get('waste_surface', 0)
+
+class PlanDecoupe(Sequence):
+    """
+    Plan de découpe compressé : une entrée (motif, multiplicité) par motif distinct.
+    Se comporte comme la liste des barres (len, itération, indexation) mais ne
+    développe les barres qu'à la demande. Les statistiques agrégées sont tenues à jour
+    à chaque ajout.
+    """
+
+    def __init__(self, entrees=()):
+        self.entrees = []
+        self._cumul = []  # nombre de barres cumulé à la fin de chaque entrée
+        self.nb_barres = 0
+        self.total_coupe = 0
+        self.total_chute = 0
+        self.total_chute_surface = 0
+        self.total_pourcentage_chute = 0
+        self.infos = {}
+        for pattern, multiplicite in entrees:
+            self.ajouter(pattern, multiplicite)
+
+    def ajouter(self, pattern, multiplicite=1):
+        """Ajoute un motif utilisé multiplicite fois (le dictionnaire est partagé, pas copié)"""
+        if multiplicite <= 0:
+            return
+        entree = EntreePlan(pattern, multiplicite)
+        self.entrees.append(entree)
+        self.nb_barres += multiplicite
+        self._cumul.append(self.nb_barres)
+        self.total_coupe += sum(pattern.get('cuts', ())) * multiplicite
+        self.total_chute += entree.waste * multiplicite
+        self.total_chute_surface += entree.surface * multiplicite
+        self.total_pourcentage_chute += pattern.get('waste_percentage', 0) * multiplicite
+
+    def __len__(self):
+        return self.nb_barres
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.nb_barres))]
+        if index < 0:
+            index += self.nb_barres
+        if not 0 <= index < self.nb_barres:
+            raise IndexError("indice de barre hors du plan")
+        return self.entrees[bisect_right(self._cumul, index)].pattern
+
+    def __iter__(self):
+        for entree in self.entrees:
+            for _ in range(entree.multiplicite):
+                yield entree.pattern
+
+    def developper(self):
+        """Liste explicite d'une barre par élément (ancien format des moteurs)"""
+        return list(self)
+
+    def pieces_produites(self):
+        """Nombre de pièces produites par longueur"""
+        produites = {}
+        for entree in self.entrees:
+            for l in entree.pattern.get('cuts', ()):
+                produites[l] = produites.get(l, 0) + entree.multiplicite
+        return produites
+
+    def surplus(self, longueurs, quantites):
+        """
+        Pièces produites au-delà de la demande {longueur: nombre}, à mettre en stock
+        """
+        produites = self.pieces_produites()
+        surplus = {}
+        for l, q in zip(longueurs, quantites):
+            if produites.get(l, 0) > q:
+                surplus[l] = produites[l] - q
+        return surplus
+
+    def motifs_uniques(self):
+        """
+        Motifs distincts avec leur nombre d'utilisations, au format de get_unique_patterns
+        """
+        uniques = {}
+        for entree in self.entrees:
+            pattern = entree.pattern
+            if 'cuts' in pattern:
+                cle = tuple(sorted(pattern['cuts']))
+                if cle not in uniques:
+                    uniques[cle] = {
+                        'pattern': pattern['cuts'],
+                        'count': 0,
+                        'waste': entree.waste
+                    }
+            else:
+                cle = (pattern['pattern']['h'], pattern['pattern']['v'])
+                if cle not in uniques:
+                    uniques[cle] = {
+                        'pattern': dict(pattern['pattern']),
+                        'count': 0,
+                        'waste_percentage': pattern['waste_percentage'],
+                        'dimensions': pattern['dimensions']
+                    }
+            uniques[cle]['count'] += entree.multiplicite
+        return list(uniques.values())
+
+def plan_depuis_barres(barres):
+    """
+    Regroupe une liste de barres {'cuts', 'waste'} en plan compressé
+    """
+    plan = PlanDecoupe()
+    index = {}
+    for barre in barres:
+        cle = tuple(sorted(barre['cuts']))
+        if cle in index:
+            index[cle][1] += 1
+        else:
+            index[cle] = [barre, 1]
+    for barre, multiplicite in index.values():
+        plan.ajouter(barre, multiplicite)
+    return plan
+
+def plan_depuis_solution(solution, longueurs, L):
+    """
+    Transforme {pattern (tuple de comptes): multiplicité} en plan de découpe compressé
+    """
+    resultats = PlanDecoupe()
+    for pattern, quantite in solution.items():
+        coupure = []
+        for j, c in enumerate(pattern):
+            coupure.extend([longueurs[j]] * c)
+        resultats.ajouter({
+            'cuts': coupure,
+            'waste': L - sum(coupure)
+        }, quantite)
+    return resultats
@@ -0,0 +1,108 @@
+# backend_portfolio.py
+
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from backend_heuristique import optimiser_decoupe_heuristique
+from backend_bornes import borne_combinatoire
+from backend_demande import DEMANDE_DEFAUT
+
+MOTEURS_PORTFOLIO = ("exact", "dcg", "heuristique")
+
+def executer_moteur(nom, longueurs, quantites, L, temps_limite, file, options=None):
+    """
+    Point d'entrée d'un processus du portfolio : exécute un moteur et transmet
+    ses incumbents puis son résultat final par la file.
+    """
+    # Groupe de processus dédié : l'arrêt du moteur arrête aussi CBC
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    from backend_anytime import MOTEURS
+
+    def callback(plan, borne):
+        file.put(('incumbent', nom, plan, borne))
+
+    infos = {}
+    try:
+        plan = MOTEURS[nom](longueurs, quantites, L, temps_limite=temps_limite, callback=callback, infos=infos,
+                            **(options or {}))
+        file.put(('fin', nom, plan, infos.get('borne_inferieure')))
+    except Exception as erreur:
+        file.put(('erreur', nom, repr(erreur), None))
+
+def arreter_processus(processus):
+    for p in processus:
+        if p.is_alive():
+            try:
+                os.killpg(p.pid, signal.SIGTERM)
+            except (AttributeError, ProcessLookupError, PermissionError):
+                p.terminate()
+    for p in processus:
+        p.join(timeout=1)
+
+def optimiser_decoupe_portfolio(longueurs, quantites, L=6000, moteurs=MOTEURS_PORTFOLIO, temps_limite=30,
+                                callback=None, infos=None, demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None):
+    """
+    Lance plusieurs moteurs en parallèle (un processus chacun) sur la même commande.
+    Tous les moteurs partagent la meilleure borne inférieure connue : dès qu'un plan
+    l'atteint, les autres moteurs sont arrêtés. À l'échéance, le meilleur plan est renvoyé.
+    callback(plan, borne) est appelé à chaque amélioration.
+    infos : dictionnaire optionnel rempli avec le moteur gagnant et le bilan de chaque moteur.
+    demande, cout_surplus, surplus_max : mode de demande transmis à chaque moteur.
+    """
+    if infos is None:
+        infos = {}
+    debut = time.perf_counter()
+    options = {'demande': demande, 'cout_surplus': cout_surplus, 'surplus_max': surplus_max}
+    borne = borne_combinatoire(longueurs, quantites, L)
+    meilleur = optimiser_decoupe_heuristique(longueurs, quantites, L, "ffd")
+    infos['gagnant'] = "heuristique"
+    infos['moteurs'] = {}
+
+    def proposer(nom, plan):
+        nonlocal meilleur
+        if plan and len(plan) < len(meilleur):
+            meilleur = plan
+            infos['gagnant'] = nom
+            if callback is not None:
+                callback(meilleur, borne)
+
+    if len(meilleur) > borne:
+        contexte = multiprocessing.get_context("spawn")
+        file = contexte.Queue()
+        processus = [
+            contexte.Process(target=executer_moteur, args=(nom, longueurs, quantites, L, temps_limite, file, options), daemon=True)
+            for nom in moteurs
+        ]
+        for p in processus:
+            p.start()
+
+        en_cours = set(moteurs)
+        echeance = debut + temps_limite * 1.1 + 2
+        while en_cours and len(meilleur) > borne:
+            try:
+                nature, nom, plan, borne_moteur = file.get(timeout=max(echeance - time.perf_counter(), 0.01))
+            except queue.Empty:
+                break  # échéance atteinte
+            if borne_moteur is not None and nature != 'erreur':
+                borne = max(borne, borne_moteur)
+            if nature == 'erreur':
+                infos['moteurs'][nom] = {'erreur': plan}
+                en_cours.discard(nom)
+                continue
+            proposer(nom, plan)
+            if nature == 'fin':
+                infos['moteurs'][nom] = {'nb_barres': len(plan), 'temps': time.perf_counter() - debut}
+                en_cours.discard(nom)
+
+        arreter_processus(processus)
+        for nom in en_cours:
+            infos['moteurs'][nom] = {'interrompu': True}
+
+    infos['borne_inferieure'] = borne
+    infos['optimal'] = len(meilleur) <= borne
+    infos['temps'] = time.perf_counter() - debut
+    meilleur.infos = infos
+    return meilleur
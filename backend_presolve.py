@@ -0,0 +1,110 @@
+# backend_presolve.py
+
+import numpy as np
+from backend_plan import PlanDecoupe
+
+def fusionner_doublons(longueurs, quantites, noms=None):
+    """
+    Regroupe les longueurs saisies plusieurs fois en additionnant leurs quantités
+    (ordre de première apparition conservé). Les noms éventuels sont joints par " / ".
+    Retourne (longueurs, quantites, noms).
+    """
+    index = {}
+    fusion_longueurs, fusion_quantites, fusion_noms = [], [], []
+    for i, (l, q) in enumerate(zip(longueurs, quantites)):
+        if l in index:
+            j = index[l]
+            fusion_quantites[j] += q
+            if noms is not None and noms[i] not in fusion_noms[j].split(" / "):
+                fusion_noms[j] += f" / {noms[i]}"
+        else:
+            index[l] = len(fusion_longueurs)
+            fusion_longueurs.append(l)
+            fusion_quantites.append(q)
+            fusion_noms.append(noms[i] if noms is not None else None)
+    return fusion_longueurs, fusion_quantites, (fusion_noms if noms is not None else None)
+
+def verifier_commande(longueurs, quantites, L):
+    """
+    Rejette les commandes irréalisables avec un message explicite
+    """
+    for l, q in zip(longueurs, quantites):
+        if l <= 0:
+            raise ValueError(f"Longueur de pièce invalide : {l} mm")
+        if q < 0:
+            raise ValueError(f"Quantité négative pour la longueur {l} mm : {q}")
+        if l > L and q > 0:
+            raise ValueError(f"La longueur {l} mm dépasse la longueur de barre {L} mm")
+
+def presoudre(longueurs, quantites, L):
+    """
+    Réductions sûres (qui ne dégradent pas l'optimum) avant la construction d'un modèle :
+    - fusion des longueurs en double ;
+    - paires complémentaires l_i + l_j = L (ou pièce de longueur L) : une barre pleine,
+      placée sans perte d'optimalité (échange avec le reste de la barre de l_i) ;
+    - pièces avec lesquelles aucune autre pièce restante ne tient (l > L - plus petite longueur) :
+      une barre à elles seules.
+    Retourne (longueurs, quantites, barres_fixees), barres_fixees étant une liste de
+    (pattern {'cuts', 'waste'}, multiplicité) et l'instance réduite ne contenant plus que
+    les longueurs de quantité non nulle.
+    """
+    verifier_commande(longueurs, quantites, L)
+    longueurs, quantites, _ = fusionner_doublons(longueurs, quantites)
+    restantes = {l: q for l, q in zip(longueurs, quantites) if q > 0}
+    barres_fixees = []
+
+    modifie = True
+    while modifie and restantes:
+        modifie = False
+
+        # Barres exactement pleines : une pièce de longueur L ou deux pièces complémentaires
+        for l in sorted(restantes, reverse=True):
+            if restantes.get(l, 0) == 0:
+                continue
+            if l == L:
+                barres_fixees.append(({'cuts': [l], 'waste': 0}, restantes[l]))
+                restantes[l] = 0
+                modifie = True
+                continue
+            complement = L - l
+            if complement < l or restantes.get(complement, 0) == 0:
+                continue
+            n = restantes[l] // 2 if complement == l else min(restantes[l], restantes[complement])
+            if n > 0:
+                barres_fixees.append(({'cuts': [l, complement], 'waste': 0}, n))
+                restantes[l] -= 2 * n if complement == l else n
+                if complement != l:
+                    restantes[complement] -= n
+                modifie = True
+        restantes = {l: q for l, q in restantes.items() if q > 0}
+
+        # Grandes pièces seules sur leur barre : rien d'autre ne tient dans la chute
+        for l in sorted(restantes, reverse=True):
+            autres = [m for m, q in restantes.items() if q > (1 if m == l else 0)]
+            if not autres or L - l < min(autres):
+                barres_fixees.append(({'cuts': [l], 'waste': L - l}, restantes[l]))
+                restantes[l] = 0
+                modifie = True
+        restantes = {l: q for l, q in restantes.items() if q > 0}
+
+    return list(restantes), list(restantes.values()), barres_fixees
+
+def reduire_valeurs(valeur, longueurs, longueurs_reduites):
+    """
+    Valeur par longueur (cout_surplus, surplus_max) ramenée aux longueurs de l'instance
+    réduite par presoudre ; scalaires et None sont rendus tels quels
+    """
+    if valeur is None or np.isscalar(valeur):
+        return valeur
+    par_longueur = dict(zip(longueurs, valeur))
+    return [par_longueur[l] for l in longueurs_reduites]
+
+def completer_plan(plan, barres_fixees):
+    """
+    Plan complet : barres fixées par le presolve suivies du plan de l'instance réduite
+    """
+    complet = PlanDecoupe(barres_fixees)
+    for entree in plan.entrees:
+        complet.ajouter(entree.pattern, entree.multiplicite)
+    complet.infos = plan.infos
+    return complet
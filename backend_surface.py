@@ -1,6 +1,19 @@
 # backend_surface.py
-import itertools
-from pulp import LpProblem, LpMinimize, LpVariable, lpSum, LpInteger, value
+from backend_decoupe import generer_patterns, indexer_depart, construire_modele_creux
+from backend_heuristique import solution_heuristique
+from backend_bornes import borne_combinatoire
+from backend_presolve import presoudre, completer_plan, reduire_valeurs, verifier_commande
+from backend_demande import preparer_demande, couts_colonnes, DEMANDE_DEFAUT
+from backend_plan import PlanDecoupe
+from backend_normalisation import normaliser, denormaliser_plan
+from backend_magasin import MagasinPatterns
+from pulp import (value, PULP_CBC_CMD, LpSolutionOptimal, LpSolutionIntegerFeasible, LpConstraintGE,
+                  LpConstraintEQ)
+import numpy as np
+import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 def calculer_surface_profile(profile_type, type_detail, longueur):
     longueur_m = longueur / 1000  # Conversion en mètres
@@ -14,101 +27,156 @@ def calculer_surface_profile(profile_type, type_detail, longueur):
         return None
     return 0
 
-def generer_patterns_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale=None):
+def generer_patterns_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale=None,
+                             trait_de_scie=0):
+    """
+    Magasin de patterns (backend_magasin). Pour les tôles, un type de pièce par couple
+    (longueur i, largeur j), d'indice i * len(largeurs) + j ; chaque pattern est une grille
+    h x v d'un même type, décrite par les attributs h, v, piece_l, piece_w et rotated.
+    Un trait de scie sépare deux pièces voisines de la grille, dans les deux directions ;
+    les profilés reçoivent des longueurs déjà normalisées avec le trait (normaliser).
+    """
     if profile_type == "Tôle/Platine" and largeur_totale:
-        patterns = []
-        for orientation in [(0, 1), (1, 0)]:
+        surface_totale = L * largeur_totale
+        types, nombres, chutes, grilles = [], [], [], []
+        for rotated in (False, True):
             for i, l in enumerate(longueurs):
                 for j, w in enumerate(largeurs):
-                    piece_l, piece_w = (l, w) if orientation == (0,1) else (w, l)
+                    piece_l, piece_w = (w, l) if rotated else (l, w)
                     if piece_l > L or piece_w > largeur_totale:
                         continue
-                    max_horizontal = L // piece_l
-                    max_vertical = largeur_totale // piece_w
+                    max_horizontal = int((L + trait_de_scie) // (piece_l + trait_de_scie))
+                    max_vertical = int((largeur_totale + trait_de_scie) // (piece_w + trait_de_scie))
                     for h in range(1, max_horizontal + 1):
                         for v in range(1, max_vertical + 1):
-                            pattern = [[0 for _ in range(len(largeurs))] for _ in range(len(longueurs))]
-                            pattern[i][j] = h * v
-                            surface_utilisee = piece_l * piece_w * h * v
-                            surface_totale = L * largeur_totale
-                            waste = surface_totale - surface_utilisee
-                            patterns.append((pattern, waste, h, v, piece_l, piece_w, orientation == (1,0)))
-        return patterns
+                            types.append(i * len(largeurs) + j)
+                            nombres.append(h * v)
+                            chutes.append(surface_totale - piece_l * piece_w * h * v)
+                            grilles.append((h, v, piece_l, piece_w, rotated))
+        comptes = np.zeros((len(types), len(longueurs) * len(largeurs)), dtype=np.int32)
+        comptes[np.arange(len(types)), types] = nombres
+        grilles = np.array(grilles, dtype=object).reshape(len(grilles), 5)
+        attributs = {cle: grilles[:, k] for k, cle in enumerate(('h', 'v', 'piece_l', 'piece_w', 'rotated'))}
+        return MagasinPatterns(np.arange(comptes.shape[1]), surface_totale, comptes, chutes, attributs)
     else:
-        return generer_patterns_longueur(longueurs, L)
+        # Profilés : bibliothèque de patterns partagée avec les moteurs 1D (backend_bibliotheque)
+        return generer_patterns(longueurs, L, quantites, maximaux=True)
+
+def resoudre_profils(longueurs, quantites, L, demande, solver, dossier_bibliotheque=None, processus=1):
+    """
+    Découpe 1D des profilés sur les patterns énumérés (CBC), demande préparée par
+    preparer_demande ; dossier_bibliotheque et processus vont à generer_patterns. Le modèle part de la solution FFD (MIP start) ; si celle-ci atteint
+    la borne inférieure combinatoire, elle est renvoyée sans résolution.
+    Retourne (plan, borne, optimal).
+    """
+    # Demande en ">=" sans coût de surplus : les patterns maximaux suffisent
+    magasin = generer_patterns(longueurs, L, quantites, maximaux=demande['mode'] == "au_moins",
+                               dossier_bibliotheque=dossier_bibliotheque, processus=processus)
+    # Les barres FFD non maximales sont ajoutées au magasin
+    depart = indexer_depart(magasin, solution_heuristique(longueurs, quantites, L))
+    borne = borne_combinatoire(longueurs, quantites, L)
+    if sum(depart.values()) <= borne:
+        # Le plan FFD atteint la borne : il est optimal
+        magasin.usages[list(depart)] = list(depart.values())
+        return magasin.plan(), borne, True
+
+    debut = time.perf_counter()
+    matrice = magasin.matrice()
+    sens = LpConstraintEQ if demande['mode'] == "exacte" else LpConstraintGE
+    maximums = demande['maximums'] if demande['mode'] == "surplus" else None
+    prob, x = construire_modele_creux(matrice, couts_colonnes(matrice, magasin.chutes, demande), quantites, sens,
+                                      maximums=maximums)
+    for i, var in enumerate(x):
+        var.setInitialValue(depart.get(i, 0))
+    temps_construction = time.perf_counter() - debut
 
-def generer_patterns_longueur(longueurs, L):
-    patterns = []
-    max_coupes = [L // l for l in longueurs]
-    for n_coupes in itertools.product(*[range(max_coupes[i]+1) for i in range(len(longueurs))]):
-        longueur_totale = sum(n_coupes[i] * longueurs[i] for i in range(len(longueurs)))
-        if 0 < longueur_totale <= L:
-            patterns.append((n_coupes, L - longueur_totale))
-    return patterns
+    debut = time.perf_counter()
+    prob.solve(solver)
+    optimal = prob.sol_status == LpSolutionOptimal and demande['mode'] != "surplus"
+    if prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        magasin.usages[:] = [int(round(value(var))) for var in x]
+    logger.info("decoupe_surface : objectif de départ %s, objectif final %s (construction %.2f s, résolution %.2f s)",
+                sum(depart.values()), value(prob.objective), temps_construction, time.perf_counter() - debut)
+    return magasin.plan(), borne, optimal
 
-def optimiser_decoupe_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale=None, epaisseur=None):
+def optimiser_decoupe_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale=None, epaisseur=None,
+                              temps_limite=None, callback=None, demande=DEMANDE_DEFAUT, cout_surplus=0.0, surplus_max=None,
+                              trait_de_scie=0, dossier_bibliotheque=None, processus=1):
+    """
+    Optimise la découpe en tenant compte des surfaces (tôles en 2D, profilés en 1D).
+    temps_limite : budget en secondes donné à CBC ; callback(plan, borne) reçoit le plan final.
+    demande, cout_surplus, surplus_max : mode de demande des profilés (voir backend_demande) ;
+    les tôles sont toujours découpées en "au moins" la quantité demandée.
+    trait_de_scie : largeur de lame (mm), entre deux pièces d'une barre ou d'une grille.
+    En 1D, la commande est normalisée avec le trait de scie (backend_normalisation) puis
+    réduite par presoudre comme dans resoudre_anytime (pièces trop longues rejetées par
+    ValueError, barres fixées rajoutées au plan), et résolue par resoudre_profils
+    (dossier_bibliotheque, processus : persistance et parallélisme de l'énumération).
+    """
+    solver = PULP_CBC_CMD(msg=0, timeLimit=temps_limite, warmStart=True)
     if profile_type == "Tôle/Platine" and largeur_totale:
-        patterns = generer_patterns_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale)
-        prob = LpProblem("decoupe_surface", LpMinimize)
-        x = [LpVariable(f"x_{i}", lowBound=0, cat=LpInteger) for i in range(len(patterns))]
-        
-        for i in range(len(longueurs)):
-            for j in range(len(largeurs)):
-                prob += lpSum(x[k] * patterns[k][0][i][j] for k in range(len(patterns))) >= quantites[i]
-        
-        prob += lpSum(x[i] * patterns[i][1] for i in range(len(patterns)))
-        prob.solve()
+        magasin = generer_patterns_surface(longueurs, largeurs, quantites, profile_type, type_detail, L, largeur_totale,
+                                           trait_de_scie)
+        # Chaque couple (longueur i, largeur j) doit atteindre la quantité de la longueur i
+        demandes = [quantites[i] for i in range(len(longueurs)) for _ in largeurs]
+        prob, x = construire_modele_creux(magasin.matrice(), magasin.chutes, demandes, LpConstraintGE, "decoupe_surface")
+        prob.solve(solver)
+        if prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+            magasin.usages[:] = [int(round(value(var))) for var in x]
 
-        resultats = []
-        for i in range(len(patterns)):
-            quantite = int(value(x[i]))
-            if quantite > 0:
-                for _ in range(quantite):
-                    _, waste, h, v, piece_l, piece_w, rotated = patterns[i]
-                    surface_waste = waste / (L * largeur_totale) * 100
-                    layout = []
-                    for _ in range(v):
-                        row = []
-                        for _ in range(h):
-                            dim = f"{piece_w}x{piece_l}" if rotated else f"{piece_l}x{piece_w}"
-                            row.append(dim)
-                        layout.append(row)
-                    resultats.append({
-                        'type': '2D',
-                        'layout': layout,
-                        'waste_surface': waste,
-                        'waste_percentage': surface_waste,
-                        'dimensions': {'plaque': {'L': L, 'l': largeur_totale}, 'piece': {'L': piece_l, 'l': piece_w, 'rotated': rotated}},
-                        'pattern': {'h': h, 'v': v}
-                    })
+        resultats = PlanDecoupe()
+        for i in np.flatnonzero(magasin.usages):
+            quantite = int(magasin.usages[i])
+            waste = magasin.chutes[i].item()
+            h, v, piece_l, piece_w, rotated = (magasin.attributs[cle][i] for cle in ('h', 'v', 'piece_l', 'piece_w', 'rotated'))
+            surface_waste = waste / (L * largeur_totale) * 100
+            layout = []
+            for _ in range(v):
+                row = []
+                for _ in range(h):
+                    dim = f"{piece_w}x{piece_l}" if rotated else f"{piece_l}x{piece_w}"
+                    row.append(dim)
+                layout.append(row)
+            resultats.ajouter({
+                'type': '2D',
+                'layout': layout,
+                'waste_surface': waste,
+                'waste_percentage': surface_waste,
+                'dimensions': {'plaque': {'L': L, 'l': largeur_totale}, 'piece': {'L': piece_l, 'l': piece_w, 'rotated': rotated}},
+                'pattern': {'h': h, 'v': v}
+            }, quantite)
+        if callback is not None and resultats:
+            callback(resultats, None)
         return resultats
     else:
-        patterns = generer_patterns_longueur(longueurs, L)
-        prob = LpProblem("decoupe", LpMinimize)
-        x = [LpVariable(f"x_{i}", lowBound=0, cat=LpInteger) for i in range(len(patterns))]
-
-        for j, l in enumerate(longueurs):
-            prob += lpSum(x[i] * patterns[i][0][j] for i in range(len(patterns))) >= quantites[j]
-
-        prob += lpSum(x[i] for i in range(len(patterns)))
-        prob.solve()
+        verifier_commande(longueurs, quantites, L)
+        longueurs_normalisees, L_normalisee, correspondance = normaliser(longueurs, L, trait_de_scie)
+        longueurs_reduites, quantites_reduites, barres_fixees = presoudre(longueurs_normalisees, quantites, L_normalisee)
+        if longueurs_reduites:
+            demande = preparer_demande(quantites_reduites, demande,
+                                       reduire_valeurs(cout_surplus, longueurs_normalisees, longueurs_reduites),
+                                       reduire_valeurs(surplus_max, longueurs_normalisees, longueurs_reduites))
+            plan, borne, optimal = resoudre_profils(longueurs_reduites, quantites_reduites, L_normalisee, demande, solver,
+                                                    dossier_bibliotheque, processus)
+        else:
+            plan, borne, optimal = PlanDecoupe(), 0, True
+        plan = denormaliser_plan(completer_plan(plan, barres_fixees), correspondance)
+        borne += sum(n for _, n in barres_fixees)
 
-        resultats = []
-        for i in range(len(patterns)):
-            quantite = int(value(x[i]))
-            if quantite > 0:
-                coupure = []
-                for j, n in enumerate(patterns[i][0]):
-                    coupure.extend([longueurs[j]] * n)
-                for _ in range(quantite):
-                    surface_totale = calculer_surface_profile(profile_type, type_detail, L)
-                    surface_utilisee = sum(calculer_surface_profile(profile_type, type_detail, l) for l in coupure)
-                    waste_surface = surface_totale - surface_utilisee if surface_totale else 0
-                    resultats.append({
-                        'type': '1D',
-                        'cuts': coupure,
-                        'waste_length': patterns[i][1],
-                        'waste_surface': waste_surface,
-                        'waste_percentage': (waste_surface / surface_totale * 100) if surface_totale else 0
-                    })
+        resultats = PlanDecoupe()
+        surface_totale = calculer_surface_profile(profile_type, type_detail, L)
+        for entree in plan.entrees:
+            quantite, pattern = entree.multiplicite, entree.pattern
+            # Surfaces calculées une seule fois par motif, pas par barre
+            surface_utilisee = sum(calculer_surface_profile(profile_type, type_detail, l) for l in pattern['cuts'])
+            waste_surface = surface_totale - surface_utilisee if surface_totale else 0
+            resultats.ajouter({
+                'type': '1D',
+                'cuts': pattern['cuts'],
+                'waste_length': pattern['waste'],
+                'waste_surface': waste_surface,
+                'waste_percentage': (waste_surface / surface_totale * 100) if surface_totale else 0
+            }, quantite)
+        if callback is not None and resultats:
+            callback(resultats, len(resultats) if optimal else borne)
         return resultats
@@ -0,0 +1,50 @@
+# benchmark_dcg.py
+
+import random
+import time
+from backend_dcg import optimiser_decoupe_dcg
+
+def generer_commande(nb_longueurs, L, graine):
+    """
+    Commande aléatoire reproductible : nb_longueurs longueurs distinctes entre L/20 et L/2
+    """
+    alea = random.Random(graine)
+    longueurs = alea.sample(range(L // 20, L // 2), nb_longueurs)
+    quantites = [alea.randint(5, 60) for _ in longueurs]
+    return longueurs, quantites
+
+def comparer_stabilisation(nb_longueurs=80, L=6000, graines=range(5), stabilisation=0.8, temps_limite=20):
+    """
+    Compare la génération de colonnes sans et avec lissage des duals (Wentges) :
+    itérations, temps de génération de colonnes (maître + pricing), temps total
+    et nombre de barres pour chaque commande.
+    """
+    lignes = []
+    for graine in graines:
+        longueurs, quantites = generer_commande(nb_longueurs, L, graine)
+        resultats = {}
+        for nom, alpha in (("standard", None), ("stabilisée", stabilisation)):
+            infos = {}
+            debut = time.perf_counter()
+            plan = optimiser_decoupe_dcg(longueurs, quantites, L, max_iterations=2000,
+                                         stabilisation=alpha, temps_limite=temps_limite, infos=infos)
+            temps_colonnes = sum(infos.get('temps_maitre', [])) + sum(infos.get('temps_pricing', []))
+            resultats[nom] = (infos.get('iterations', 0), temps_colonnes, time.perf_counter() - debut, len(plan))
+        lignes.append((graine, resultats))
+
+        (it_std, t_std, tt_std, nb_std) = resultats["standard"]
+        (it_stab, t_stab, tt_stab, nb_stab) = resultats["stabilisée"]
+        print(f"commande {graine} : {it_std} -> {it_stab} itérations ({it_std - it_stab:+d} économisées), "
+              f"génération de colonnes {t_std:.2f} s -> {t_stab:.2f} s, total {tt_std:.2f} s -> {tt_stab:.2f} s, "
+              f"{nb_std} / {nb_stab} barres")
+
+    total_std = sum(r["standard"][0] for _, r in lignes)
+    total_stab = sum(r["stabilisée"][0] for _, r in lignes)
+    temps_std = sum(r["standard"][1] for _, r in lignes)
+    temps_stab = sum(r["stabilisée"][1] for _, r in lignes)
+    print(f"total : {total_std - total_stab} itérations économisées sur {total_std}, génération de colonnes "
+          f"{temps_std:.2f} s -> {temps_stab:.2f} s")
+    return lignes
+
+if __name__ == "__main__":
+    comparer_stabilisation()
@@ -0,0 +1,62 @@
+# conftest.py : les modules backend_*.py sont à la racine du dépôt
+
+import os
+import random
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_bornes import borne_combinatoire  # noqa: E402
+from backend_heuristique import solution_heuristique  # noqa: E402
+
+def commande_aleatoire(graine, L=100, n_max=5, quantite_max=6, fraction_min=8):
+    """Commande reproductible de 2 à n_max longueurs distinctes entre L/fraction_min et 3L/5"""
+    rng = random.Random(graine)
+    longueurs = rng.sample(range(L // fraction_min, L * 3 // 5), rng.randint(2, n_max))
+    quantites = [rng.randint(1, quantite_max) for _ in longueurs]
+    return longueurs, quantites, L
+
+def commandes_difficiles(nombre, **options):
+    """
+    Les nombre premières commandes aléatoires où FFD n'atteint pas la borne combinatoire :
+    aucun moteur ne peut y renvoyer le plan FFD sans résoudre
+    """
+    commandes, graine = [], 0
+    while len(commandes) < nombre:
+        longueurs, quantites, L = commande_aleatoire(graine, **options)
+        if sum(solution_heuristique(longueurs, quantites, L).values()) > borne_combinatoire(longueurs, quantites, L):
+            commandes.append((longueurs, quantites, L))
+        graine += 1
+    return commandes
+
+def optimum_exact(longueurs, quantites, L):
+    """
+    Nombre minimal de barres par programmation dynamique sur les quantités restantes,
+    sans solveur ni heuristique (petites commandes seulement). La plus grande pièce
+    restante est placée dans la barre suivante, complétée de toutes les façons possibles.
+    """
+    ordre = sorted(range(len(longueurs)), key=lambda i: longueurs[i], reverse=True)
+    tailles = [longueurs[i] for i in ordre]
+    n = len(tailles)
+
+    @lru_cache(maxsize=None)
+    def barres(reste):
+        if not any(reste):
+            return 0
+        premier = next(k for k in range(n) if reste[k])
+        meilleur = [sum(reste)]  # une pièce par barre
+
+        def remplir(k, capacite, prises):
+            if k == n:
+                suivant = tuple(r - p for r, p in zip(reste, prises))
+                meilleur[0] = min(meilleur[0], 1 + barres(suivant))
+                return
+            minimum = 1 if k == premier else 0
+            for c in range(min(reste[k], capacite // tailles[k]), minimum - 1, -1):
+                remplir(k + 1, capacite - c * tailles[k], prises + (c,))
+
+        remplir(premier, L, (0,) * premier)
+        return meilleur[0]
+
+    return barres(tuple(quantites[i] for i in ordre))
@@ -0,0 +1,68 @@
+# test_bibliotheque.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend_bibliotheque import BibliothequePatterns
+from backend_enumeration import enumerer_patterns
+from conftest import commande_aleatoire
+
+def ensemble(comptes, chutes):
+    return {(tuple(c), int(ch)) for c, ch in zip(comptes.tolist(), chutes.tolist())}
+
+def attendu(longueurs, L, quantites, maximaux=False):
+    return {(tuple(n), chute) for n, chute in enumerer_patterns(longueurs, L, quantites, maximaux)}
+
+@pytest.mark.parametrize("graine", range(10))
+def test_patterns_servis_par_le_cache(graine):
+    longueurs, quantites, L = commande_aleatoire(graine, L=1000, n_max=5, quantite_max=10, fraction_min=12)
+    bibliotheque = BibliothequePatterns()
+    # Quantités plus petites puis plus grandes : la seconde énumération n'a lieu que si les plafonds augmentent
+    for q in ([max(1, n // 2) for n in quantites], quantites, quantites):
+        for maximaux in (False, True):
+            assert ensemble(*bibliotheque.patterns(longueurs, L, q, maximaux)) == attendu(longueurs, L, q, maximaux)
+    statistiques = bibliotheque.statistiques()
+    assert statistiques['echecs'] <= 2 and statistiques['succes'] + statistiques['echecs'] == 6
+
+def test_eviction_selon_les_octets():
+    bibliotheque = BibliothequePatterns()
+    bibliotheque.patterns([31, 23, 17], 200)
+    octets = bibliotheque.statistiques()['octets']
+    bibliotheque.octets_max = octets
+    bibliotheque.patterns([29, 21, 13], 200)
+    statistiques = bibliotheque.statistiques()
+    assert statistiques['entrees'] == 1
+    assert statistiques['octets'] == sum(e['comptes'].nbytes + e['chutes'].nbytes
+                                         for e in bibliotheque.entrees.values())
+    # Une entrée plus grande que la limite est gardée tant qu'elle est la dernière rangée
+    bibliotheque.octets_max = 1
+    bibliotheque.patterns([31, 23, 17], 200)
+    assert bibliotheque.statistiques()['entrees'] == 1
+
+def test_dossier_propre_a_chaque_appel(tmp_path):
+    bibliotheque = BibliothequePatterns()
+    bibliotheque.patterns([31, 23, 17], 200, dossier=str(tmp_path))
+    bibliotheque.patterns([29, 21, 13], 200)
+    assert len(os.listdir(tmp_path)) == 1
+    relue = BibliothequePatterns()
+    assert ensemble(*relue.patterns([17, 23, 31], 200, dossier=str(tmp_path))) == attendu([17, 23, 31], 200, None)
+    assert relue.statistiques()['lectures_disque'] == 1
+
+def test_appels_concurrents():
+    bibliotheque = BibliothequePatterns()
+    commandes = [commande_aleatoire(graine, L=1000, n_max=5, quantite_max=10, fraction_min=12) for graine in range(8)] * 3
+    with ThreadPoolExecutor(max_workers=6) as executeur:
+        resultats = list(executeur.map(lambda c: bibliotheque.patterns(c[0], c[2], c[1]), commandes))
+    for (longueurs, quantites, L), resultat in zip(commandes, resultats):
+        assert ensemble(*resultat) == attendu(longueurs, L, quantites)
+    statistiques = bibliotheque.statistiques()
+    assert statistiques['succes'] + statistiques['echecs'] == len(commandes)
+
+def test_bilan_dans_les_infos_de_l_appelant():
+    bibliotheque = BibliothequePatterns()
+    infos = {}
+    bibliotheque.patterns([31, 23, 17], 200, infos=infos)
+    assert infos['enumeration']['processus'] == 1 and infos['enumeration']['temps_enumeration'] >= 0
+    autres = {}
+    bibliotheque.patterns([31, 23, 17], 200, infos=autres)
+    assert 'enumeration' not in autres
@@ -0,0 +1,33 @@
+# test_bornes.py
+
+import pytest
+from backend_bornes import borne_combinatoire, calculer_bornes
+from backend_highs import optimiser_decoupe_highs
+from backend_dcg import borne_lp
+from conftest import commandes_difficiles, optimum_exact
+
+# (longueurs, quantites, L, nombre de barres optimal)
+INSTANCES_CONNUES = [
+    ([6], [5], 10, 5),  # une pièce par barre : L1 ne donne que 3, L2 est exacte
+    ([4], [5], 10, 3),  # deux pièces par barre : seule la DFF est exacte
+    ([3], [7], 10, 3),
+    ([6, 4], [3, 3], 10, 3),  # barres pleines 6 + 4
+    ([7, 5, 3], [2, 3, 4], 10, 5),
+    ([51, 34, 27], [4, 5, 6], 100, 7),
+]
+
+@pytest.mark.parametrize("longueurs, quantites, L, optimum", INSTANCES_CONNUES)
+def test_borne_combinatoire_atteint_l_optimum_connu(longueurs, quantites, L, optimum):
+    assert borne_combinatoire(longueurs, quantites, L) == optimum
+
+@pytest.mark.parametrize("longueurs, quantites, L", commandes_difficiles(20))
+def test_bornes_jamais_au_dessus_de_l_optimum(longueurs, quantites, L):
+    # FFD n'atteint pas la borne combinatoire : l'optimum vient de la force brute, et le
+    # modèle exact HiGHS est réellement construit et résolu
+    optimum = optimum_exact(longueurs, quantites, L)
+    assert len(optimiser_decoupe_highs(longueurs, quantites, L, demande="au_moins")) == optimum
+    for nom, borne in calculer_bornes(longueurs, quantites, L).items():
+        assert borne <= optimum, nom
+    assert borne_lp(longueurs, quantites, L) <= optimum
+    # Budget épuisé d'emblée : la borne renvoyée reste valable
+    assert borne_lp(longueurs, quantites, L, temps_limite=0) <= optimum
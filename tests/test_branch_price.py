@@ -0,0 +1,29 @@
+# test_branch_price.py
+
+import pytest
+from backend_branch_price import optimiser_decoupe_branch_price
+
+# (longueurs, quantites, nombre de barres optimal) sur des barres de 100 ; FFD n'y atteint pas la
+# borne combinatoire, la recherche arborescente est donc lancée
+INSTANCES = [
+    ([51, 44, 19, 32], [1, 3, 2, 2], 3),
+    ([29, 26, 41, 40], [5, 1, 1, 2], 3),
+    ([32, 21, 37, 53], [1, 1, 5, 1], 4),
+]
+
+@pytest.mark.parametrize("longueurs, quantites, optimum", INSTANCES)
+def test_branch_price_atteint_l_optimum(longueurs, quantites, optimum):
+    infos = {}
+    plan = optimiser_decoupe_branch_price(longueurs, quantites, 100, infos=infos)
+    assert len(plan) == optimum
+    assert infos['optimal']
+
+@pytest.mark.parametrize("max_iterations", [1, 2, 3])
+@pytest.mark.parametrize("longueurs, quantites, optimum", INSTANCES)
+def test_pas_de_preuve_sans_convergence(longueurs, quantites, optimum, max_iterations):
+    # Génération de colonnes tronquée : les noeuds ne bornent rien, l'optimalité annoncée doit être vraie
+    infos = {}
+    plan = optimiser_decoupe_branch_price(longueurs, quantites, 100, max_iterations=max_iterations, infos=infos)
+    assert len(plan) >= optimum
+    if infos['optimal']:
+        assert len(plan) == optimum
@@ -0,0 +1,35 @@
+# test_estimation.py
+
+import pytest
+from backend_estimation import estimer_taille, choisir_moteur, patterns_du_modele
+from backend_enumeration import enumerer_patterns
+from backend_arcflow import construire_graphe_arcflow
+from conftest import commande_aleatoire
+
+def commande(graine):
+    """Commandes de conftest, sur des barres de longueurs variées"""
+    return commande_aleatoire(graine, L=(1000, 2500, 6000)[graine % 3], n_max=7, quantite_max=12,
+                              fraction_min=15)
+
+@pytest.mark.parametrize("graine", range(15))
+def test_estimation_compte_les_patterns_enumeres(graine):
+    longueurs, quantites, L = commande(graine)
+    estimation = estimer_taille(longueurs, quantites, L)
+    assert estimation['patterns'] == sum(1 for _ in enumerer_patterns(longueurs, L, quantites))
+    assert estimation['patterns_maximaux'] == sum(1 for _ in enumerer_patterns(longueurs, L, quantites, maximaux=True))
+
+@pytest.mark.parametrize("graine", range(15))
+def test_estimation_compte_le_graphe_arcflow(graine):
+    longueurs, quantites, L = commande(graine)
+    estimation = estimer_taille(longueurs, quantites, L)
+    noeuds, arcs = construire_graphe_arcflow(longueurs, quantites, L)
+    assert estimation['noeuds'] == len(noeuds)
+    assert estimation['arcs'] == len(arcs)
+
+def test_choix_du_moteur_selon_la_demande():
+    longueurs, quantites, L = commande(0)
+    estimation = estimer_taille(longueurs, quantites, L)
+    # Sans mode précisé, l'estimation porte sur le mode par défaut des moteurs
+    assert patterns_du_modele(estimation) == estimation['patterns_maximaux']
+    assert patterns_du_modele(estimation, "exacte") == estimation['patterns']
+    assert choisir_moteur(estimation) == choisir_moteur(estimation, "au_moins")
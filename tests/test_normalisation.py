@@ -0,0 +1,56 @@
+# test_normalisation.py
+
+from collections import Counter
+from decimal import Decimal
+import pytest
+from backend_normalisation import en_unites, normaliser, denormaliser_plan
+from backend_heuristique import optimiser_decoupe_heuristique
+from backend_anytime import resoudre_anytime
+from conftest import commande_aleatoire
+
+TRAITS = (0.5, 1.6, 3, 4.25)
+
+def commande_decimale(graine):
+    """Commande de conftest en centièmes de mm : longueurs et barre décimales, trait de scie non nul"""
+    longueurs, quantites, L = commande_aleatoire(graine, L=(123456, 600000, 250075)[graine % 3], quantite_max=8)
+    return [l / 100 for l in longueurs], quantites, L / 100, TRAITS[graine % len(TRAITS)]
+
+def verifier_barres(plan, longueurs, quantites, L, trait_de_scie):
+    """Chaque barre tient dans L traits compris, sa chute est le reste, la commande est produite exactement"""
+    L, trait = Decimal(str(L)), Decimal(str(trait_de_scie))
+    produites = Counter()
+    for barre in plan:
+        coupes = [Decimal(str(c)) for c in barre['cuts']]
+        occupe = sum(coupes) + trait * (len(coupes) - 1)
+        assert occupe <= L
+        assert Decimal(str(barre['waste'])) == L - occupe
+        produites.update(barre['cuts'])
+    assert produites == Counter(dict(zip(longueurs, quantites)))
+
+@pytest.mark.parametrize("graine", range(12))
+def test_plan_denormalise_tient_dans_la_barre(graine):
+    longueurs, quantites, L, trait_de_scie = commande_decimale(graine)
+    longueurs_norm, L_norm, correspondance = normaliser(longueurs, L, trait_de_scie)
+    assert [correspondance['longueurs'][l] for l in longueurs_norm] == longueurs
+    plan = denormaliser_plan(optimiser_decoupe_heuristique(longueurs_norm, quantites, L_norm), correspondance)
+    verifier_barres(plan, longueurs, quantites, L, trait_de_scie)
+
+@pytest.mark.parametrize("moteur", ["dcg", "highs"])
+@pytest.mark.parametrize("graine", range(6))
+def test_resoudre_anytime_avec_trait_de_scie(moteur, graine):
+    longueurs, quantites, L, trait_de_scie = commande_decimale(graine)
+    for etape in resoudre_anytime(longueurs, quantites, L, moteur, 5, trait_de_scie=trait_de_scie, demande="exacte"):
+        verifier_barres(etape['plan'], longueurs, quantites, L, trait_de_scie)
+
+@pytest.mark.parametrize("longueur, par_barre", [(248.5, 4), (248.51, 3)])
+def test_trait_de_scie_apres_la_derniere_piece(longueur, par_barre):
+    # 4 x 248.5 + 3 traits de 2 = 1000 : la dernière pièce n'a pas de trait après elle
+    longueurs_norm, L_norm, correspondance = normaliser([longueur], 1000, 2)
+    plan = denormaliser_plan(optimiser_decoupe_heuristique(longueurs_norm, [12], L_norm), correspondance)
+    assert len(plan) == 12 // par_barre
+    verifier_barres(plan, [longueur], [12], 1000, 2)
+
+def test_longueur_hors_resolution():
+    assert en_unites(12.34) == 1234
+    with pytest.raises(ValueError):
+        normaliser([100.005], 1000)
@@ -0,0 +1,58 @@
+# test_presolve.py
+
+import pytest
+from backend_presolve import presoudre, completer_plan
+from backend_highs import optimiser_decoupe_highs
+from backend_plan import PlanDecoupe
+from backend_heuristique import solution_heuristique
+from backend_bornes import borne_combinatoire
+from conftest import commandes_difficiles, optimum_exact
+
+def commandes_reductibles(nombre):
+    """
+    Commandes où FFD n'est pas optimal, complétées de lignes que presoudre réduit : longueur
+    saisie deux fois, barre pleine, paire complémentaire et grande pièce seule sur sa barre.
+    Seules celles dont l'instance réduite résiste encore à FFD sont gardées : le modèle exact
+    y est réellement résolu.
+    """
+    commandes = []
+    for longueurs, quantites, L in commandes_difficiles(4 * nombre):
+        if quantites[0] < 2:
+            continue
+        commande = (longueurs + [longueurs[0], L, L - 11, 11, 9 * L // 10],
+                    [quantites[0] - 1] + quantites[1:] + [1, 1, 2, 2, 1], L)
+        reduites, quantites_reduites, _ = presoudre(*commande)
+        if sum(solution_heuristique(reduites, quantites_reduites, L).values()) > borne_combinatoire(
+                reduites, quantites_reduites, L):
+            commandes.append(commande)
+    return commandes[:nombre]
+
+@pytest.mark.parametrize("demande", ["au_moins", "exacte"])
+@pytest.mark.parametrize("longueurs, quantites, L", commandes_reductibles(8))
+def test_presolve_conserve_l_optimum(longueurs, quantites, L, demande):
+    reduites, quantites_reduites, barres_fixees = presoudre(longueurs, quantites, L)
+    nb_fixees = sum(n for _, n in barres_fixees)
+    assert nb_fixees and len(reduites) < len(set(longueurs))
+    # Optimum par force brute, sans solveur : la réduction ne le dégrade pas
+    optimum = optimum_exact(longueurs, quantites, L)
+    assert optimum_exact(reduites, quantites_reduites, L) + nb_fixees == optimum
+
+    plan_reduit = (optimiser_decoupe_highs(reduites, quantites_reduites, L, demande=demande)
+                   if reduites else PlanDecoupe())
+    plan = completer_plan(plan_reduit, barres_fixees)
+    assert len(plan) == optimum
+
+    # Le plan complété couvre toute la commande, doublons compris
+    demandes = {}
+    for l, q in zip(longueurs, quantites):
+        demandes[l] = demandes.get(l, 0) + q
+    produites = plan.pieces_produites()
+    for l, q in demandes.items():
+        if demande == "exacte":
+            assert produites.get(l, 0) == q
+        else:
+            assert produites.get(l, 0) >= q
+
+def test_presolve_rejette_les_pieces_trop_longues():
+    with pytest.raises(ValueError):
+        presoudre([500, 1200], [1, 1], 1000)
@@ -0,0 +1,58 @@
+# test_sac_a_dos.py
+
+import itertools
+import random
+import pytest
+from backend_dcg import resoudre_sac_a_dos_borne, resoudre_sac_a_dos_exclusions
+
+def patterns_par_force_brute(valeurs, longueurs, bornes, L):
+    """Tous les patterns non vides réalisables, avec leur valeur"""
+    plages = [range(min(b, L // l) + 1) for b, l in zip(bornes, longueurs)]
+    for comptes in itertools.product(*plages):
+        if any(comptes) and sum(c * l for c, l in zip(comptes, longueurs)) <= L:
+            yield sum(c * v for c, v in zip(comptes, valeurs)), comptes
+
+def instance_aleatoire(graine):
+    rng = random.Random(graine)
+    n = rng.randint(2, 5)
+    L = rng.randint(30, 60)
+    longueurs = [rng.randint(4, L) for _ in range(n)]
+    bornes = [rng.randint(1, 3) for _ in range(n)]
+    # Duals nuls (lignes sur-couvertes) et négatifs (demande exacte, surplus) compris
+    valeurs = [rng.choice([0.0, round(rng.uniform(-0.5, 1.0), 3)]) for _ in range(n)]
+    return valeurs, longueurs, bornes, L
+
+@pytest.mark.parametrize("valeurs, longueurs, bornes, L, exclus, attendu", [
+    ([0.0, 0.9], [32, 6], [1, 1], 39, {(0, 1)}, 0.9),  # (1, 1) : la pièce de valeur nulle rend le pattern autorisé
+    ([0.5, 0.9, 0.0], [20, 6, 10], [1, 1, 1], 39, {(1, 1, 0)}, 1.4),
+])
+def test_exclusions_cas_connus(valeurs, longueurs, bornes, L, exclus, attendu):
+    valeur, comptes = resoudre_sac_a_dos_exclusions(valeurs, longueurs, bornes, L, exclus)
+    assert valeur == pytest.approx(attendu)
+    assert tuple(comptes) not in exclus
+
+@pytest.mark.parametrize("graine", range(60))
+def test_exclusions_contre_force_brute(graine):
+    valeurs, longueurs, bornes, L = instance_aleatoire(graine)
+    patterns = sorted(patterns_par_force_brute(valeurs, longueurs, bornes, L), reverse=True)
+    # Les meilleurs patterns sont exclus, comme après plusieurs branchements
+    exclus = {comptes for _, comptes in patterns[:random.Random(graine).randint(1, 4)]}
+    permis = [v for v, comptes in patterns if comptes not in exclus and v > 1e-12]
+
+    valeur, comptes = resoudre_sac_a_dos_exclusions(valeurs, longueurs, bornes, L, exclus)
+    if not permis:
+        assert comptes is None
+        return
+    assert valeur == pytest.approx(max(permis))
+    assert tuple(comptes) not in exclus
+    assert sum(c * l for c, l in zip(comptes, longueurs)) <= L
+    assert all(c <= b for c, b in zip(comptes, bornes))
+    assert sum(c * v for c, v in zip(comptes, valeurs)) == pytest.approx(valeur)
+
+@pytest.mark.parametrize("graine", range(30))
+def test_sac_a_dos_borne_contre_force_brute(graine):
+    valeurs, longueurs, bornes, L = instance_aleatoire(graine)
+    meilleure = max([v for v, _ in patterns_par_force_brute(valeurs, longueurs, bornes, L)] + [0.0])
+    valeur, comptes = resoudre_sac_a_dos_borne(valeurs, longueurs, bornes, L)
+    assert valeur == pytest.approx(meilleure)
+    assert sum(c * l for c, l in zip(comptes, longueurs)) <= L